@@ -1,19 +1,27 @@
 import os
 import re
 import json
+import asyncio
+import heapq
+import hashlib
 from pathlib import Path
-from typing import List, Tuple, Set, Dict
+from typing import List, Optional, Tuple, Set, Dict
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text
+from sqlalchemy import Column, Integer, String, Float, Text
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 import fitz
+import numpy as np
+from scipy import sparse
 from dotenv import load_dotenv
 import google.generativeai as genai
 
-DATABASE_URL = "sqlite:///resumes.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+from database import add_missing_columns, make_engine
+from pdf_extract import extract_text_async, shutdown_pool
+
+DATABASE_URL = os.getenv("APP_DATABASE_URL", "sqlite:///resumes.db")
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -31,22 +39,49 @@ class Resume(Base):
     skills_score = Column(Float)
     experience_score = Column(Float)
     education_score = Column(Float)
-    overall_score = Column(Float)
+    overall_score = Column(Float, index=True)
     strengths = Column(Text)
     gaps = Column(Text)
     justification = Column(Text)
     job_match_percentage = Column(Integer, default=0)
     match_reasoning = Column(Text, default="")
-
-Base.metadata.create_all(bind=engine)
+    raw_text = Column(Text)
+    content_hash = Column(String, index=True)
+    text_mtime = Column(Float)
+    features = Column(Text)
+    recommendation = Column(String)
 
 def safe_filename(name: str) -> str:
     return re.sub(r"[^A-Za-z0-9._-]", "_", name)
 
+def parse_pdf_text(path: str) -> str:
+    with fitz.open(path) as doc:
+        return "\n".join(page.get_text() for page in doc)
+
+def file_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+async def extract_stored_text(path: Path) -> Tuple[str, str, float]:
+    """Parse a stored upload and return (text, content_hash, mtime) for persisting on its row."""
+    data = path.read_bytes()
+    return await extract_text_async(str(path)), file_sha256(data), path.stat().st_mtime
+
+def needs_extraction(resume: "Resume", path: Path) -> bool:
+    if resume.raw_text is None or resume.content_hash is None:
+        return True
+    return resume.text_mtime is not None and path.stat().st_mtime != resume.text_mtime
+
 
 
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+SKILLS_HEADER_RE = re.compile(r"\bskills?\b[:\-]?\s*$", re.I)
+TECH_SKILLS_RE = re.compile(r"\btechnical skills?\b", re.I)
+SECTION_HEADER_RE = re.compile(r"^[A-Z][A-Za-z0-9 ]{0,40}:$")
+SKILL_SPLIT_RE = re.compile(r"[•,\n;]+")
+SKILL_TOKEN_RE = re.compile(r"[a-z]{2,}[a-z0-9+\-#\.]*")
+TOKEN_RE = re.compile(r"[A-Za-z0-9+#\-.]+")
+YEARS_RE = re.compile(r"(\d{1,2})(\s*\+?)\s*(years?|yrs?|yr)")
 
 def extract_entities(text: str) -> Tuple[str, str, str, List[str]]:
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
@@ -58,19 +93,19 @@ def extract_entities(text: str) -> Tuple[str, str, str, List[str]]:
     skills_section = []
     skills = []
     for i, ln in enumerate(lines):
-        if re.search(r"\bskills?\b[:\-]?\s*$", ln, re.I) or re.search(r"\btechnical skills?\b", ln, re.I):
+        if SKILLS_HEADER_RE.search(ln) or TECH_SKILLS_RE.search(ln):
             for j in range(i + 1, min(i + 10, len(lines))):
-                if re.match(r"^[A-Z][A-Za-z0-9 ]{0,40}:$", lines[j]):
+                if SECTION_HEADER_RE.match(lines[j]):
                     break
                 skills_section.append(lines[j])
             break
     if skills_section:
         blob = " ".join(skills_section)
-        parts = re.split(r"[•,\n;]+", blob)
+        parts = SKILL_SPLIT_RE.split(blob)
         skills = [p.strip().lower() for p in parts if len(p.strip()) >= 2][:40]
     else:
         toks = tokenize(" ".join(lines[:40]))
-        skills = sorted({t for t in toks if re.search(r"[a-z]{2,}[a-z0-9+\-#\.]*", t)})[:30]
+        skills = sorted({t for t in toks if SKILL_TOKEN_RE.search(t)})[:30]
     return name, email, phone, skills
 
 STOPWORDS = {
@@ -80,8 +115,10 @@ STOPWORDS = {
 }
 
 def tokenize(text: str) -> List[str]:
-    toks = re.findall(r"[A-Za-z0-9+#\-.]+", text.lower())
-    return [t for t in toks if t not in STOPWORDS and not t.isdigit()]
+    return tokens_from_lowered(text.lower())
+
+def tokens_from_lowered(lowered: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(lowered) if t not in STOPWORDS and not t.isdigit()]
 
 def setify(tokens: List[str]) -> Set[str]:
     return set(tokens)
@@ -94,28 +131,63 @@ def jaccard(a: Set[str], b: Set[str]) -> float:
     return inter / union if union else 0.0
 
 def estimate_years(text: str) -> float:
+    return years_from_lowered(text.lower())
+
+def years_from_lowered(lowered: str) -> float:
     years = 0.0
-    for m in re.finditer(r"(\d{1,2})(\s*\+?)\s*(years?|yrs?|yr)", text.lower()):
-        try:
-            val = float(m.group(1))
-            years = max(years, val)
-        except:
-            continue
+    for m in YEARS_RE.finditer(lowered):
+        years = max(years, float(m.group(1)))
     return years
 
 EDU_KEYWORDS = {
     "bsc","b.s.","btech","b.tech","be","b.e.","bs","bachelor","m.sc","ms","m.s.","msc","mtech","m.tech","me","m.e.","master","phd","ph.d","doctorate"
 }
 
+# One alternation scan finds any keyword as a substring, same as testing each keyword in turn
+EDU_RE = re.compile("|".join(re.escape(k) for k in sorted(EDU_KEYWORDS, key=len, reverse=True)))
+
+def has_education(text: str) -> bool:
+    return EDU_RE.search(text.lower()) is not None
+
 def has_requested_education(jd_text: str, resume_text: str) -> Tuple[bool, bool]:
-    jd_has = any(k in jd_text.lower() for k in EDU_KEYWORDS)
-    res_has = any(k in resume_text.lower() for k in EDU_KEYWORDS)
-    return jd_has, res_has
+    return has_education(jd_text), has_education(resume_text)
+
+class ResumeFeatures:
+    """Everything the local scorer needs from a resume, computed in one pass by extract_features."""
+    __slots__ = ("tokens", "email", "phone", "years", "has_edu")
+
+    def __init__(self, tokens: Set[str], email: str, phone: str, years: float, has_edu: bool):
+        self.tokens = tokens
+        self.email = email
+        self.phone = phone
+        self.years = years
+        self.has_edu = has_edu
+
+    def to_json(self) -> str:
+        return json.dumps([sorted(self.tokens), self.email, self.phone, self.years, self.has_edu])
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ResumeFeatures":
+        tokens, email, phone, years, has_edu = json.loads(raw)
+        return cls(set(tokens), email, phone, years, has_edu)
+
+def extract_features(text: str) -> ResumeFeatures:
+    lowered = text.lower()
+    email_match = EMAIL_RE.search(text)
+    phone_match = PHONE_RE.search(text)
+    return ResumeFeatures(
+        # Filter the distinct tokens only; repeated words are checked once instead of per occurrence
+        tokens={t for t in set(TOKEN_RE.findall(lowered)) if t not in STOPWORDS and not t.isdigit()},
+        email=email_match.group(0) if email_match else "",
+        phone=phone_match.group(0) if phone_match else "",
+        years=years_from_lowered(lowered),
+        has_edu=EDU_RE.search(lowered) is not None,
+    )
 
 def score_resume_against_jd(jd: str, resume_text: str, resume_skills: List[str]) -> Dict[str, object]:
     jd_tokens = setify(tokenize(jd))
     res_tokens = setify(tokenize(resume_text))
-    jd_skill_candidates = [t for t in jd_tokens if re.search(r"[a-z]{2,}[a-z0-9+\-#\.]*", t)]
+    jd_skill_candidates = [t for t in jd_tokens if SKILL_TOKEN_RE.search(t)]
     jd_skills = set(jd_skill_candidates)
     res_skills = set([s.lower() for s in resume_skills])
     skills_overlap = jaccard(res_skills, jd_skills)
@@ -155,6 +227,117 @@ def score_resume_against_jd(jd: str, resume_text: str, resume_skills: List[str])
         "match_reasoning": justification
     }
 
+def recommend(overall_score: float) -> str:
+    if overall_score >= 8.0:
+        return "Highly Recommended"
+    if overall_score >= 6.5:
+        return "Recommended"
+    if overall_score >= 5.0:
+        return "Maybe"
+    return "Not Recommended"
+
+def incidence_matrix(rows: List[Set[str]], vocab: Dict[str, int]) -> sparse.csr_matrix:
+    indptr, indices = [0], []
+    for terms in rows:
+        indices.extend(vocab[t] for t in terms)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float64)
+    return sparse.csr_matrix((data, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)), shape=(len(rows), len(vocab)))
+
+class ResumePool:
+    """
+    Precomputed sparse token and skill incidence for a set of resumes, so any number of JDs
+    can be scored against the whole pool with a few sparse products. score() returns exactly
+    what score_resume_against_jd returns for each (resume_text, resume_skills) pair, in order.
+    """
+
+    def __init__(self, docs: List[Tuple[str, List[str]]], features: List[ResumeFeatures] = None):
+        if features is None:
+            features = [extract_features(text) for text, _ in docs]
+        token_sets = [f.tokens for f in features]
+        skill_sets = [set([s.lower() for s in skills]) for _, skills in docs]
+        self.token_vocab = {t: i for i, t in enumerate(sorted(set().union(*token_sets)))}
+        self.skill_terms = sorted(set().union(*skill_sets))
+        self.skill_vocab = {t: i for i, t in enumerate(self.skill_terms)}
+        self.tokens = incidence_matrix(token_sets, self.token_vocab)
+        self.skills = incidence_matrix(skill_sets, self.skill_vocab)
+        self.token_counts = np.diff(self.tokens.indptr)
+        self.skill_counts = np.diff(self.skills.indptr)
+        self.years = [f.years for f in features]
+        self.has_edu = [f.has_edu for f in features]
+
+    def __len__(self):
+        return self.tokens.shape[0]
+
+    def _jaccard(self, matrix, counts, query_terms: Set[str], vocab: Dict[str, int]) -> np.ndarray:
+        query = np.zeros(len(vocab), dtype=np.float64)
+        query[[vocab[t] for t in query_terms if t in vocab]] = 1.0
+        inter = np.asarray(matrix @ query).astype(np.int64)
+        union = counts + len(query_terms) - inter
+        result = np.zeros(len(counts), dtype=np.float64)
+        valid = (counts > 0) & (union > 0) if query_terms else np.zeros(len(counts), dtype=bool)
+        result[valid] = inter[valid] / union[valid]
+        return result
+
+    def _components(self, jd: str):
+        jd_tokens = setify(tokenize(jd))
+        jd_skills = set(t for t in jd_tokens if SKILL_TOKEN_RE.search(t))
+        skills_overlap = self._jaccard(self.skills, self.skill_counts, jd_skills, self.skill_vocab)
+        jd_years = estimate_years(jd)
+        if jd_years > 0:
+            experience_ratio = np.minimum(np.array(self.years, dtype=np.float64) / jd_years, 1.0)
+        else:
+            experience_ratio = self._jaccard(self.tokens, self.token_counts, jd_tokens, self.token_vocab)
+        jd_has_edu = has_education(jd)
+        return jd_skills, jd_years, jd_has_edu, skills_overlap, experience_ratio
+
+    def score(self, jd: str, indices=None) -> List[Dict[str, object]]:
+        """Full score dicts for the given row indices (all rows by default)."""
+        jd_skills, jd_years, jd_has_edu, skills_overlap, experience_ratio = self._components(jd)
+
+        # Matched skill columns per resume, for strengths/gaps
+        jd_skill_cols = np.zeros(len(self.skill_vocab), dtype=np.float64)
+        jd_skill_cols[[self.skill_vocab[t] for t in jd_skills if t in self.skill_vocab]] = 1.0
+        matched = self.skills.multiply(jd_skill_cols).tocsr()
+        matched.eliminate_zeros()
+
+        results = []
+        for i in (range(len(self)) if indices is None else indices):
+            skills_score = round(10.0 * float(skills_overlap[i]), 2)
+            experience_score = round(10.0 * float(experience_ratio[i]), 2)
+            res_has_edu = self.has_edu[i]
+            if jd_has_edu and res_has_edu:
+                education_score = 9.0
+            elif jd_has_edu and not res_has_edu:
+                education_score = 5.0
+            else:
+                education_score = 7.0
+            overall_score = round((0.45 * skills_score + 0.4 * experience_score + 0.15 * education_score), 2)
+            common = {self.skill_terms[c] for c in matched.indices[matched.indptr[i]:matched.indptr[i + 1]]}
+            strengths = sorted(common)[:20]
+            gaps = sorted(jd_skills - common)[:20]
+            res_years = self.years[i]
+            justification = (
+                f"Skills overlap: {len(strengths)} matched items; experience years={res_years} "
+                f"vs required={jd_years if jd_years else 'n/a'}; education_required={jd_has_edu} "
+                f"education_found={res_has_edu}."
+            )
+            results.append({
+                "skills_score": skills_score,
+                "experience_score": experience_score,
+                "education_score": education_score,
+                "overall_score": overall_score,
+                "strengths": strengths,
+                "gaps": gaps,
+                "justification": justification,
+                "job_match_percentage": int(min(100, round(overall_score * 10))),
+                "match_reasoning": justification
+            })
+        return results
+
+# Last pool built by /match, reused while the stored resumes are unchanged
+_pool_cache: Tuple[tuple, "ResumePool"] = (None, None)
+
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -195,6 +378,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Created on startup rather than import so main.py can reuse the helpers
+# below without this module's table layout claiming the shared resumes.db
+@app.on_event("startup")
+def create_tables():
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine, Base.metadata)
+
+@app.on_event("shutdown")
+def stop_extraction_pool():
+    shutdown_pool()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -207,6 +401,7 @@ async def batch_upload(files: List[UploadFile] = File(...), db: Session = Depend
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
     results = []
+    saved = []
     for file in files:
         if not file.filename:
             raise HTTPException(status_code=400, detail="One file has no filename")
@@ -219,13 +414,19 @@ async def batch_upload(files: List[UploadFile] = File(...), db: Session = Depend
             raise HTTPException(status_code=400, detail=f"Empty file: {fname}")
         with open(path, "wb") as f:
             f.write(data)
-        try:
-            text = parse_pdf_text(str(path))
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=str(e))
+        saved.append((fname, path, file_sha256(data)))
+    # Parse all files in parallel on the extraction process pool
+    texts = await asyncio.gather(*[extract_text_async(str(path)) for _, path, _ in saved], return_exceptions=True)
+    for (fname, path, content_hash), text in zip(saved, texts):
+        if isinstance(text, Exception):
+            raise HTTPException(status_code=422, detail=f"{fname}: {text}")
         name, email, phone, skills = extract_entities(text)
         resume = Resume(
             filename=fname,
+            raw_text=text,
+            features=extract_features(text).to_json(),
+            content_hash=content_hash,
+            text_mtime=path.stat().st_mtime,
             candidate_name=name,
             email=email,
             phone=phone,
@@ -247,21 +448,51 @@ async def batch_upload(files: List[UploadFile] = File(...), db: Session = Depend
     return {"uploaded": results}
 
 @app.post("/match")
-async def match(job_description: str = Form(...), db: Session = Depends(get_db)):
+async def match(
+    job_description: str = Form(...),
+    top_k: Optional[int] = Form(None, ge=1),
+    min_score: Optional[float] = Form(None),
+    recommendation: Optional[List[str]] = Form(None),
+    db: Session = Depends(get_db)
+):
     if not job_description or not job_description.strip():
         raise HTTPException(status_code=400, detail="job_description is required")
     resumes = db.query(Resume).all()
-    shortlisted = []
+
+    # Text is stored at upload; only rows without it (or with a changed file) are re-parsed
+    stale = []
     for r in resumes:
         path = UPLOAD_DIR / r.filename if r.filename else None
-        resume_text = ""
-        if path and path.exists():
-            try:
-                resume_text = parse_pdf_text(str(path))
-            except Exception:
-                resume_text = ""
-        res_skills = [s.strip() for s in (r.skills or "").split(",") if s.strip()]
-        scores = score_resume_against_jd(job_description, resume_text, res_skills)
+        if path and path.exists() and needs_extraction(r, path):
+            stale.append((r, path))
+    if stale:
+        extracted = await asyncio.gather(*[extract_stored_text(path) for _, path in stale], return_exceptions=True)
+        for (r, _), outcome in zip(stale, extracted):
+            if isinstance(outcome, Exception):
+                continue
+            r.raw_text, r.content_hash, r.text_mtime = outcome
+            r.features = extract_features(r.raw_text).to_json()
+        db.commit()
+
+    # Score the whole pool in one vectorized pass, rebuilding the matrices only when resumes change
+    global _pool_cache
+    skill_lists = [[s.strip() for s in (r.skills or "").split(",") if s.strip()] for r in resumes]
+    signature = tuple((r.id, r.content_hash, r.skills) for r in resumes)
+    if _pool_cache[0] != signature:
+        features = []
+        for r in resumes:
+            # Rows stored before features existed get them computed once and saved
+            if r.features is None:
+                r.features = extract_features(r.raw_text or "").to_json()
+            features.append(ResumeFeatures.from_json(r.features))
+        docs = [(r.raw_text or "", skills) for r, skills in zip(resumes, skill_lists)]
+        _pool_cache = (signature, ResumePool(docs, features))
+    pool_scores = _pool_cache[1].score(job_description)
+
+    # Every row keeps its scores; only the top_k that pass the filters are serialized
+    wanted = {rec.lower() for rec in recommendation} if recommendation else None
+    ranked = []
+    for i, (r, scores) in enumerate(zip(resumes, pool_scores)):
         r.skills_score = scores["skills_score"]
         r.experience_score = scores["experience_score"]
         r.education_score = scores["education_score"]
@@ -271,14 +502,27 @@ async def match(job_description: str = Form(...), db: Session = Depends(get_db))
         r.justification = scores["justification"]
         r.job_match_percentage = scores["job_match_percentage"]
         r.match_reasoning = scores["match_reasoning"]
-        db.commit()
+        r.recommendation = recommend(r.overall_score)
+        if min_score is not None and r.overall_score < min_score:
+            continue
+        if wanted is not None and r.recommendation.lower() not in wanted:
+            continue
+        ranked.append((r.overall_score, -r.id, i))
+    db.commit()
+    matched = len(ranked)
+    # Bounded heap selection: O(n log k) instead of sorting the whole pool
+    ranked = heapq.nlargest(top_k, ranked) if top_k else sorted(ranked, reverse=True)
+
+    shortlisted = []
+    for _, _, i in ranked:
+        r = resumes[i]
         shortlisted.append({
             "id": r.id,
             "filename": r.filename,
             "candidate_name": r.candidate_name,
             "email": r.email,
             "phone": r.phone,
-            "skills": res_skills,
+            "skills": skill_lists[i],
             "skills_score": r.skills_score,
             "experience_score": r.experience_score,
             "education_score": r.education_score,
@@ -288,9 +532,9 @@ async def match(job_description: str = Form(...), db: Session = Depends(get_db))
             "gaps": [g for g in (r.gaps or "").split(",") if g],
             "justification": r.justification,
             "match_reasoning": r.match_reasoning,
+            "recommendation": r.recommendation,
         })
-    shortlisted.sort(key=lambda x: x["overall_score"], reverse=True)
-    return {"shortlisted_candidates": shortlisted}
+    return {"total_candidates": len(resumes), "matched_filters": matched, "shortlisted_candidates": shortlisted}
 
 @app.get("/models")
 def get_models():
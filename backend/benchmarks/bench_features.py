@@ -0,0 +1,94 @@
+"""
+Microbenchmark: single-pass app.extract_features vs. the per-helper scans app.py used before
+(each helper re-lowering the text, inline patterns, one substring scan per EDU_KEYWORDS entry),
+plus the path /match takes once features are stored: ResumeFeatures.from_json on the saved column.
+
+    cd backend && python benchmarks/bench_features.py --docs 2000
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import EMAIL_RE, PHONE_RE, STOPWORDS, EDU_KEYWORDS, ResumeFeatures, extract_features
+
+def legacy_tokenize(text):
+    toks = re.findall(r"[A-Za-z0-9+#\-.]+", text.lower())
+    return [t for t in toks if t not in STOPWORDS and not t.isdigit()]
+
+def legacy_estimate_years(text):
+    years = 0.0
+    for m in re.finditer(r"(\d{1,2})(\s*\+?)\s*(years?|yrs?|yr)", text.lower()):
+        years = max(years, float(m.group(1)))
+    return years
+
+def legacy_has_education(text):
+    return any(k in text.lower() for k in EDU_KEYWORDS)
+
+def legacy_features(text):
+    email = EMAIL_RE.search(text)
+    phone = PHONE_RE.search(text)
+    return (
+        set(legacy_tokenize(text)),
+        email.group(0) if email else "",
+        phone.group(0) if phone else "",
+        legacy_estimate_years(text),
+        legacy_has_education(text),
+    )
+
+VOCAB = (
+    "Python Java SQL AWS Docker Kubernetes React Node.js C++ C# TensorFlow PyTorch Spark Airflow "
+    "led built designed shipped migrated scaled team platform pipeline service api latency "
+    "Bachelor Master B.Tech M.S. PhD university engineering computer science years experience"
+).split()
+
+def synthetic_resume(rng, words):
+    lines = [f"Candidate {rng.randint(1, 10**6)}", f"cand{rng.randint(1, 10**6)}@example.com", "+1 555 010 2030"]
+    lines += [" ".join(rng.choice(VOCAB) for _ in range(12)) for _ in range(words // 12)]
+    lines.append(f"{rng.randint(1, 15)}+ years of experience")
+    return "\n".join(lines)
+
+def best_of(fn, docs, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = [synthetic_resume(rng, args.words) for _ in range(args.docs)]
+    for doc in docs[:50]:
+        f = extract_features(doc)
+        assert (f.tokens, f.email, f.phone, f.years, f.has_edu) == legacy_features(doc)
+
+    legacy = best_of(legacy_features, docs, args.repeat)
+    single_pass = best_of(extract_features, docs, args.repeat)
+    stored = [extract_features(doc).to_json() for doc in docs]
+    from_stored = best_of(ResumeFeatures.from_json, stored, args.repeat)
+    print(json.dumps({
+        "docs": args.docs,
+        "words_per_doc": args.words,
+        "legacy_helpers_s": round(legacy, 4),
+        "extract_features_s": round(single_pass, 4),
+        "speedup": round(legacy / single_pass, 2),
+        "from_stored_features_s": round(from_stored, 4),
+        "stored_speedup": round(legacy / from_stored, 2),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+End-to-end offline benchmark: synthetic PDF resumes and JDs driven through PDF extraction,
+app.score_resume_against_jd, /batch-upload and /match in-process, against fake_llm.FakeModel
+with configurable latency and error rate. Reports throughput, p50/p95/p99 latency and peak RSS
+per stage as JSON. Runs in a temporary directory and never touches the real database or Gemini.
+
+    cd backend && python benchmarks/bench_pipeline.py --resumes 200 --jds 5 --llm-latency 0.05 --output bench.json
+    cd backend && python benchmarks/bench_pipeline.py --baseline bench.json   # exits 1 on a regression
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SCORING_MODES = ("llm", "local", "semantic", "cascade")
+
+SKILLS = (
+    "Python Java SQL AWS Docker Kubernetes React Node.js C++ C# TensorFlow PyTorch Spark Airflow "
+    "Terraform Go Rust Kafka Redis PostgreSQL GraphQL TypeScript Figma Excel Tableau"
+).split()
+FILLER = (
+    "led built designed shipped migrated scaled team platform pipeline service api latency "
+    "customers reliability ownership mentored reduced improved delivered cost revenue quality"
+).split()
+DEGREES = ("B.Tech in Computer Science", "M.S. in Data Science", "Bachelor of Commerce", "PhD in Physics", "Diploma in Design")
+
+def synthetic_resume(rng, index, words):
+    skills = rng.sample(SKILLS, 8)
+    lines = [
+        f"Candidate {index}",
+        f"candidate{index}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "SUMMARY",
+        f"{rng.randint(1, 15)}+ years of experience with {', '.join(skills[:3])}.",
+        "SKILLS",
+        ", ".join(skills),
+        "EXPERIENCE",
+    ]
+    for _ in range(max(1, words // 12)):
+        lines.append("- " + " ".join(rng.choice(FILLER + skills) for _ in range(12)))
+    lines += ["EDUCATION", rng.choice(DEGREES), "REFERENCES", "Available on request"]
+    return lines
+
+def synthetic_jd(rng, words):
+    skills = rng.sample(SKILLS, 6)
+    body = " ".join(rng.choice(FILLER + skills) for _ in range(words))
+    return f"Looking for an engineer with {rng.randint(2, 8)} years of experience in {', '.join(skills)}. {body}"
+
+def render_pdf(lines):
+    import fitz
+    doc = fitz.open()
+    page, y = None, 0
+    for line in lines:
+        if page is None or y > 790:
+            page, y = doc.new_page(), 60
+        page.insert_text((50, y), line, fontsize=9)
+        y += 12
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def current_rss():
+    """Resident set size of this process in bytes; falls back to the lifetime peak off Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class RssSampler:
+    """Polls RSS on a background thread so each stage gets its own peak, not the process lifetime one."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, current_rss())
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, current_rss())
+
+def single(fn, *args):
+    """A stage call that processes one item."""
+    def call():
+        fn(*args)
+        return 1
+    return call
+
+def run_stage(calls, setup=None):
+    """
+    Time each zero-argument call; a call returns the number of items it processed and raises on
+    failure. `setup` runs untimed before every call. Returns the stage report.
+    """
+    latencies, errors, items = [], 0, 0
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        for call in calls:
+            if setup is not None:
+                paused = time.perf_counter()
+                setup()
+                start += time.perf_counter() - paused
+            began = time.perf_counter()
+            try:
+                items += call()
+            except Exception as e:
+                errors += 1
+                print(f"benchmark call failed: {e}", file=sys.stderr)
+            latencies.append(time.perf_counter() - began)
+        elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (0.0, 0.0, 0.0)
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "items": items,
+        "total_s": round(elapsed, 4),
+        "throughput_per_s": round(items / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def run_benchmarks(args, workdir):
+    rng = random.Random(args.seed)
+    resumes = [synthetic_resume(rng, i, args.words) for i in range(args.resumes)]
+    jds = [synthetic_jd(rng, args.jd_words) for _ in range(args.jds)]
+    pdfs = [render_pdf(lines) for lines in resumes]
+    paths = []
+    for i, data in enumerate(pdfs):
+        paths.append(os.path.join(workdir, f"resume_{i}.pdf"))
+        with open(paths[-1], "wb") as f:
+            f.write(data)
+
+    # Imported only now: the modules read their configuration from the environment at import time
+    import fake_llm
+    import llm_client
+    import main
+    from app import parse_pdf_text, score_resume_against_jd
+    from pdf_extract import extract_pdf_text
+    from database import ScoreCache, Session as SessionLocal
+    from fastapi.testclient import TestClient
+
+    llm_client.get_model = lambda: fake_llm.FakeModel(latency=args.llm_latency, error_rate=args.llm_error_rate, seed=args.seed)
+    llm_client._client = None
+
+    def clear_score_cache():
+        db = SessionLocal()
+        try:
+            db.query(ScoreCache).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    stages = {}
+    stages["pdf_extract"] = run_stage([single(extract_pdf_text, data) for data in pdfs])
+    stages["parse_pdf_text"] = run_stage([single(parse_pdf_text, path) for path in paths])
+    texts = [extract_pdf_text(data) for data in pdfs]
+    stages["score_resume_against_jd"] = run_stage([
+        single(score_resume_against_jd, jd, text, []) for jd in jds for text in texts
+    ])
+
+    with TestClient(main.app) as client:
+        def upload(batch, mode):
+            def call():
+                files = [("files", (f"resume_{i}.pdf", pdfs[i], "application/pdf")) for i in batch]
+                response = client.post("/batch-upload", files=files, data={"mode": mode})
+                response.raise_for_status()
+                body = response.json()
+                if body["failed"]:
+                    raise RuntimeError(f"{body['failed']} of {len(batch)} files failed to upload")
+                return body["successful"]
+            return call
+
+        batches = chunks(list(range(len(pdfs))), args.upload_batch)
+        stages["batch_upload"] = run_stage([upload(batch, "replace" if i == 0 else "append") for i, batch in enumerate(batches)])
+
+        def match(jd, mode):
+            def call():
+                # incremental=false plus an empty score cache: every call scores from scratch
+                response = client.post("/match", data={"job_description": jd, "scoring_mode": mode, "incremental": "false"})
+                response.raise_for_status()
+                body = response.json()
+                outcomes["failed"] += body["outcomes"]["failed"]
+                outcomes["llm_calls"] += body["llm_calls"]
+                return body["total_candidates"]
+            return call
+
+        for mode in args.modes:
+            outcomes = {"failed": 0, "llm_calls": 0}
+            stages[f"match_{mode}"] = run_stage(
+                [match(jd, mode) for _ in range(args.match_rounds) for jd in jds], setup=clear_score_cache
+            )
+            stages[f"match_{mode}"].update(outcomes)
+    return stages
+
+def compare(report, baseline, tolerance):
+    """Stages whose p95 latency or throughput is worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for name, stage in report["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and stage["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {stage['p95_ms']}ms")
+        if before["throughput_per_s"] and stage["throughput_per_s"] < before["throughput_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_per_s']}/s -> {stage['throughput_per_s']}/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--words", type=int, default=400, help="words of experience per resume (more words, more pages)")
+    parser.add_argument("--jds", type=int, default=3)
+    parser.add_argument("--jd-words", type=int, default=120)
+    parser.add_argument("--upload-batch", type=int, default=25, help="files per /batch-upload request")
+    parser.add_argument("--modes", nargs="+", choices=SCORING_MODES, default=list(SCORING_MODES))
+    parser.add_argument("--match-rounds", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="earlier report to compare against; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before failing")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="resume-bench-")
+    # Everything the app writes (databases, embeddings, uploads) lands in the scratch directory
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        APP_DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'app.db')}",
+        EMBEDDING_DIR=os.path.join(workdir, "embeddings"),
+        LLM_BACKEND="fake",
+        LLM_RATE_PER_SECOND="0",
+    )
+    os.environ.pop("UPLOAD_RETENTION_DIR", None)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        stages = run_benchmarks(args, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "stages": stages,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
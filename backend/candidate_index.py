@@ -0,0 +1,65 @@
+import os
+from typing import List, Iterable, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app import tokenize
+from database import Resume, ResumeTerm, DB_WRITE_CHUNK
+
+# Default number of candidates /match sends to the LLM after the overlap cut
+PREFILTER_TOP_N = int(os.getenv("PREFILTER_TOP_N", "200"))
+# Stored for resumes with no terms (e.g. scanned PDFs) so index_missing does not re-index them on every
+# request; tokenize never yields an empty string, so the marker cannot match a JD term
+NO_TERMS_MARKER = ""
+
+def resume_terms(resume: Resume) -> set:
+    terms = set(tokenize(resume.raw_text or ""))
+    terms.update(tokenize(resume.skills or ""))
+    return terms
+
+def index_resumes(db: Session, resumes: Iterable[Resume]):
+    """(Re)index resumes in the term -> resume_id table; the caller commits."""
+    resumes = list(resumes)
+    remove_from_index(db, [r.id for r in resumes])
+    rows = [{"term": term, "resume_id": r.id} for r in resumes for term in (resume_terms(r) or {NO_TERMS_MARKER})]
+    for start in range(0, len(rows), DB_WRITE_CHUNK):
+        db.execute(insert(ResumeTerm), rows[start:start + DB_WRITE_CHUNK])
+
+def remove_from_index(db: Session, resume_ids: Optional[List[int]] = None):
+    """Drop index entries for the given resumes, or for every resume when resume_ids is None."""
+    query = db.query(ResumeTerm)
+    if resume_ids is not None:
+        if not resume_ids:
+            return
+        query = query.filter(ResumeTerm.resume_id.in_(resume_ids))
+    query.delete(synchronize_session=False)
+
+def index_missing(db: Session) -> int:
+    """Index resumes stored before the index existed; returns how many were added."""
+    indexed = select(ResumeTerm.resume_id).distinct()
+    missing = db.query(Resume).filter(Resume.id.notin_(indexed)).all()
+    if missing:
+        index_resumes(db, missing)
+    return len(missing)
+
+def prefilter_candidates(db: Session, job_description: str, top_n: int = PREFILTER_TOP_N) -> Optional[List[int]]:
+    """
+    Return up to top_n resume IDs ranked by how many JD terms they share (empty when nothing
+    overlaps), or None when no cut applies because the pool is already small enough.
+    """
+    if top_n <= 0 or db.query(Resume).count() <= top_n:
+        return None
+    jd_terms = set(tokenize(job_description))
+    if not jd_terms:
+        return []
+    overlap = func.count(ResumeTerm.term).label("overlap")
+    rows = (
+        db.query(ResumeTerm.resume_id, overlap)
+        .filter(ResumeTerm.term.in_(jd_terms))
+        .group_by(ResumeTerm.resume_id)
+        .order_by(overlap.desc(), ResumeTerm.resume_id)
+        .limit(top_n)
+        .all()
+    )
+    return [resume_id for resume_id, _ in rows]
@@ -1,14 +1,53 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime
+import os
+import json
+from sqlalchemy import create_engine, event, func, inspect, select, text, update, insert, Column, Index, Integer, String, Float, Text, DateTime
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
-DATABASE_URL = "sqlite:///./resumes.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Any SQLAlchemy URL; the SQLite file next to the app is the default
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./resumes.db")
+# SQLite connection tuning (ignored for other databases)
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+def make_engine(url=DATABASE_URL):
+    """
+    Engine for `url` with a bounded connection pool. SQLite connections run in WAL mode with
+    synchronous=NORMAL, a busy timeout and memory-mapped reads, so readers never block the writer
+    and concurrent writers wait instead of failing with "database is locked".
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+    in_memory = ":memory:" in url or url.rstrip("/") == "sqlite:"
+    # In-memory databases live in a single connection, so they keep SQLAlchemy's default pool
+    pool_args = {} if in_memory else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    bind = create_engine(url, connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT}, **pool_args)
+    @event.listens_for(bind, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    return bind
+engine = make_engine()
 Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
+# Rows per statement for bulk inserts/updates; everything still commits in one transaction
+DB_WRITE_CHUNK = int(os.getenv("DB_WRITE_CHUNK", "500"))
 class Resume(Base):
     __tablename__ = "resumes"
+    # IDs are never reused, so results, job rows and embeddings keyed by a deleted resume cannot attach to a new one
+    __table_args__ = {"sqlite_autoincrement": True}
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, index=True)
+    content_hash = Column(String, unique=True, index=True)
     candidate_name = Column(String)
     email = Column(String)
     phone = Column(String)
@@ -16,16 +55,191 @@ class Resume(Base):
     experience = Column(Text)
     education = Column(Text)
     raw_text = Column(Text)
-    match_score = Column(Float)
+    match_score = Column(Float, index=True)
     skills_score = Column(Float)
     experience_score = Column(Float)
     education_score = Column(Float)
     justification = Column(Text)
+    recommendation = Column(String)
     job_description = Column(Text)
+    profile_extracted_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+class ScoreCache(Base):
+    __tablename__ = "score_cache"
+    cache_key = Column(String, primary_key=True)
+    resume_hash = Column(String, index=True)
+    jd_hash = Column(String, index=True)
+    model_name = Column(String)
+    prompt_version = Column(String)
+    result = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
-def setup_database():
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+class ResumeTerm(Base):
+    __tablename__ = "resume_terms"
+    term = Column(String, primary_key=True)
+    resume_id = Column(Integer, primary_key=True, index=True)
+class MatchJob(Base):
+    __tablename__ = "match_jobs"
+    id = Column(String, primary_key=True)
+    job_description = Column(Text)
+    options = Column(Text)
+    status = Column(String, index=True)
+    total = Column(Integer)
+    completed = Column(Integer, default=0)
+    stats = Column(Text)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+class MatchJobResult(Base):
+    __tablename__ = "match_job_results"
+    __table_args__ = (Index("ix_match_job_results_rank", "job_id", "overall_score"),)
+    job_id = Column(String, primary_key=True)
+    resume_id = Column(Integer, primary_key=True)
+    overall_score = Column(Float)
+    recommendation = Column(String)
+    # "llm" or "local" for cascade jobs, ranked tier first; NULL for the other scoring modes
+    tier = Column(String)
+    result = Column(Text)
+class JobDescription(Base):
+    __tablename__ = "job_descriptions"
+    id = Column(Integer, primary_key=True)
+    jd_hash = Column(String, unique=True, index=True)
+    text = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+class MatchResult(Base):
+    __tablename__ = "match_results"
+    __table_args__ = (Index("ix_match_results_rank", "jd_id", "scoring_mode", "overall_score"),)
+    resume_id = Column(Integer, primary_key=True, index=True)
+    jd_id = Column(Integer, primary_key=True)
+    scoring_mode = Column(String, primary_key=True)
+    scorer = Column(String)
+    overall_score = Column(Float)
+    skills_score = Column(Float)
+    experience_score = Column(Float)
+    education_score = Column(Float)
+    recommendation = Column(String)
+    result = Column(Text)
+    scored_at = Column(DateTime, default=datetime.utcnow)
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+def init_db():
     Base.metadata.create_all(bind=engine)
-def get_session():
+    add_missing_columns()
+    run_migrations()
+def add_missing_columns(bind=engine, metadata=Base.metadata):
+    # create_all never alters existing tables, so columns added to a model later are appended here
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+    # Indexes on columns added above (including unique ones SQLite cannot declare inline)
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+def copy_legacy_scores(conn):
+    # Resumes scored before match_results existed kept only their last JD and scores on the row
+    from score_cache import hash_text, normalize_job_description
+    rows = conn.execute(select(Resume).where(Resume.job_description.isnot(None), Resume.match_score.isnot(None))).all()
+    jd_ids = {}
+    for row in rows:
+        jd_hash = hash_text(normalize_job_description(row.job_description))
+        if jd_hash not in jd_ids:
+            existing = conn.execute(select(JobDescription.id).where(JobDescription.jd_hash == jd_hash)).scalar()
+            if existing is None:
+                existing = conn.execute(insert(JobDescription).values(
+                    jd_hash=jd_hash, text=row.job_description, created_at=datetime.utcnow()
+                )).inserted_primary_key[0]
+            jd_ids[jd_hash] = existing
+        jd_id = jd_ids[jd_hash]
+        if conn.execute(select(MatchResult.resume_id).where(
+            MatchResult.resume_id == row.id, MatchResult.jd_id == jd_id, MatchResult.scoring_mode == "llm"
+        )).first():
+            continue
+        candidate = {
+            "resume_id": row.id,
+            "candidate_name": row.candidate_name,
+            "email": row.email,
+            "phone": row.phone,
+            "filename": row.filename,
+            "skills": row.skills.split(", ") if row.skills else [],
+            "overall_score": row.match_score,
+            "skills_score": row.skills_score,
+            "experience_score": row.experience_score,
+            "education_score": row.education_score,
+            "strengths": [],
+            "gaps": [],
+            "justification": row.justification,
+            "recommendation": row.recommendation,
+            "status": "scored",
+            "cached": False
+        }
+        conn.execute(insert(MatchResult).values(
+            resume_id=row.id, jd_id=jd_id, scoring_mode="llm", overall_score=row.match_score,
+            skills_score=row.skills_score, experience_score=row.experience_score,
+            education_score=row.education_score, recommendation=row.recommendation,
+            result=json.dumps(candidate), scored_at=datetime.utcnow()
+        ))
+def rebuild_resumes_with_autoincrement(conn):
+    # SQLite without AUTOINCREMENT hands out max(id) + 1, so deleting the newest resumes (or all of
+    # them) let new uploads reuse IDs. create_all cannot alter the table, so it is rebuilt here
+    if conn.dialect.name != "sqlite":
+        return
+    table_sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'resumes'")).scalar()
+    if table_sql is None or "AUTOINCREMENT" in table_sql.upper():
+        return
+    indexes = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'resumes' AND sql IS NOT NULL")).scalars().all()
+    for name in indexes:
+        conn.execute(text(f'DROP INDEX "{name}"'))
+    conn.execute(text("ALTER TABLE resumes RENAME TO resumes_old"))
+    Resume.__table__.create(conn)
+    columns = ", ".join(f'"{column.name}"' for column in Resume.__table__.columns)
+    conn.execute(text(f"INSERT INTO resumes ({columns}) SELECT {columns} FROM resumes_old"))
+    conn.execute(text("DROP TABLE resumes_old"))
+    # Start above every ID stored results still refer to, including resumes deleted before the rebuild
+    highest = max(conn.execute(select(func.max(column))).scalar() or 0
+                  for column in (Resume.id, MatchResult.resume_id, MatchJobResult.resume_id))
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'resumes'"))
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('resumes', :seq)"), {"seq": highest})
+# Ordered data migrations, each applied once per database and recorded in schema_migrations.
+# Additive schema changes (new tables, columns, indexes) need no entry: init_db handles those.
+MIGRATIONS = [
+    (1, "Copy per-resume scores into match_results", copy_legacy_scores),
+    (2, "Rebuild resumes with AUTOINCREMENT IDs", rebuild_resumes_with_autoincrement),
+]
+def run_migrations(bind=engine, migrations=MIGRATIONS):
+    with bind.connect() as conn:
+        applied = set(conn.execute(select(SchemaMigration.version)).scalars())
+    for version, description, migrate in migrations:
+        if version in applied:
+            continue
+        try:
+            with bind.begin() as conn:
+                # Recording the version first makes a second process running the same migration fail fast
+                conn.execute(insert(SchemaMigration).values(version=version, description=description, applied_at=datetime.utcnow()))
+                migrate(conn)
+        except IntegrityError:
+            continue
+def bulk_add(db, rows, chunk_size=DB_WRITE_CHUNK):
+    # Flushing per chunk assigns primary keys without committing
+    for start in range(0, len(rows), chunk_size):
+        db.add_all(rows[start:start + chunk_size])
+        db.flush()
+def bulk_update(db, model, mappings, chunk_size=DB_WRITE_CHUNK):
+    # Each mapping carries the primary key plus the columns to set (executemany UPDATE ... WHERE id = ?)
+    for start in range(0, len(mappings), chunk_size):
+        db.execute(update(model), mappings[start:start + chunk_size])
+def get_db():
     db = Session()
     try:
         yield db
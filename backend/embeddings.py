@@ -0,0 +1,265 @@
+import os
+import json
+import math
+import zlib
+import uuid
+import shutil
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialised within one process
+    fcntl = None
+
+from app import tokenize
+from database import Resume
+
+EMBEDDING_DIR = os.getenv("EMBEDDING_DIR", "./embeddings")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
+# Optional sentence-transformers model name; the hashed n-gram vectorizer is used when unset or unavailable
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+# Compact once tombstoned rows exceed this fraction of the store
+EMBEDDING_COMPACT_RATIO = float(os.getenv("EMBEDDING_COMPACT_RATIO", "0.3"))
+
+class HashedNgramEmbedder:
+    """
+    Dependency-free fallback: word unigrams and bigrams hashed into a fixed number of signed
+    buckets with sublinear term frequency, L2-normalised so a dot product is cosine similarity.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashed-ngram-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text or "")
+            grams = Counter(tokens)
+            grams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+            for gram, count in grams.items():
+                # crc32 rather than hash() so vectors stay stable across processes and restarts
+                h = zlib.crc32(gram.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(count))
+        return normalize_rows(vectors)
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode([t or "" for t in texts], convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.astype(np.float32)
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+_embedder = None
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        if EMBEDDING_MODEL:
+            try:
+                _embedder = SentenceTransformerEmbedder(EMBEDDING_MODEL)
+            except Exception as e:
+                print(f"Embedding model {EMBEDDING_MODEL} unavailable ({e}); using hashed n-grams")
+        if _embedder is None:
+            _embedder = HashedNgramEmbedder()
+    return _embedder
+
+class EmbeddingStore:
+    """
+    Append-only, memory-mapped resume embeddings. `directory/meta.json` names the embedder and the
+    current generation; each generation directory holds raw files that only ever grow:
+    vectors.f32 (rows x dim float32), ids.i64 (resume ID per row) and tombstones.i64 (dead row numbers).
+    Uploads append rows, deletes append tombstones, and once dead rows pass EMBEDDING_COMPACT_RATIO
+    the live rows are copied into a new generation. Every process maps the same files, so uvicorn
+    workers share the pages through the OS cache and see each other's appends on their next read.
+    """
+
+    def __init__(self, directory: str = EMBEDDING_DIR, embedder=None):
+        self.directory = directory
+        self.embedder = embedder or get_embedder()
+        self.lock = threading.Lock()
+        self._view = None
+        os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            meta = self._read_meta()
+            if meta.get("embedder") != self.embedder.name or meta.get("dim") != self.embedder.dim:
+                # Vectors from another embedder (or the old .npy layout) are unusable; start a fresh generation
+                self._switch_generation(np.zeros((0, self.embedder.dim), dtype=np.float32), np.zeros(0, dtype=np.int64))
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        """Serialise writers across threads and, where flock exists, across worker processes."""
+        with self.lock, open(self._path(".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _files(self, generation: str) -> Tuple[str, str, str]:
+        return tuple(self._path(generation, name) for name in ("vectors.f32", "ids.i64", "tombstones.i64"))
+
+    def _switch_generation(self, vectors: np.ndarray, ids: np.ndarray):
+        """Write a complete new generation, then point meta.json at it with an atomic rename."""
+        old = self._read_meta().get("generation")
+        generation = f"gen-{uuid.uuid4().hex[:12]}"
+        os.makedirs(self._path(generation))
+        vectors_path, ids_path, tombstones_path = self._files(generation)
+        vectors.astype(np.float32).tofile(vectors_path)
+        ids.astype(np.int64).tofile(ids_path)
+        open(tombstones_path, "wb").close()
+        with open(self._path("meta.json.tmp"), "w") as f:
+            json.dump({"embedder": self.embedder.name, "dim": self.embedder.dim, "generation": generation}, f)
+        os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+        if old:
+            # Processes still mapping the old files keep them until they remap (POSIX unlink semantics)
+            shutil.rmtree(self._path(old), ignore_errors=True)
+
+    def _snapshot(self):
+        """(vectors memmap, ids, live mask) for the current files, remapped only when they changed."""
+        while True:
+            generation = self._read_meta()["generation"]
+            vectors_path, ids_path, tombstones_path = self._files(generation)
+            try:
+                sizes = tuple(os.path.getsize(p) for p in (vectors_path, ids_path, tombstones_path))
+                break
+            except FileNotFoundError:
+                continue  # another worker compacted in between; re-read meta.json
+        key = (generation, sizes)
+        if self._view is None or self._view[0] != key:
+            dim = self.embedder.dim
+            # ids.i64 is written last on append, so it decides how many rows are complete
+            rows = min(sizes[0] // (4 * dim), sizes[1] // 8)
+            if rows:
+                vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+            else:
+                vectors = np.zeros((0, dim), dtype=np.float32)
+            ids = np.fromfile(ids_path, dtype=np.int64, count=rows)
+            tombstones = np.fromfile(tombstones_path, dtype=np.int64)
+            live = np.ones(rows, dtype=bool)
+            live[tombstones[tombstones < rows]] = False
+            self._view = (key, vectors, ids, live)
+        return self._view[1:]
+
+    def _append(self, path: str, array: np.ndarray):
+        with open(path, "ab") as f:
+            f.write(array.tobytes())
+
+    def _tombstone(self, rows: np.ndarray):
+        if len(rows):
+            _, _, tombstones_path = self._files(self._read_meta()["generation"])
+            self._append(tombstones_path, rows.astype(np.int64))
+
+    def __len__(self):
+        with self.lock:
+            return int(self._snapshot()[2].sum())
+
+    def add(self, resume_ids: List[int], texts: List[str]):
+        """Embed and append texts; earlier rows for the same resume IDs are tombstoned."""
+        if not resume_ids:
+            return
+        vectors = self.embedder.embed(texts)
+        with self._locked():
+            _, ids, live = self._snapshot()
+            vectors_path, ids_path, tombstones_path = self._files(self._read_meta()["generation"])
+            # Drop anything a crashed append left half-written, so the files stay aligned
+            rows = len(ids)
+            os.truncate(vectors_path, rows * 4 * self.embedder.dim)
+            os.truncate(ids_path, rows * 8)
+            os.truncate(tombstones_path, os.path.getsize(tombstones_path) // 8 * 8)
+            # Tombstones go first: a crash part-way leaves a resume unembedded (backfilled by /match), never doubled
+            self._tombstone(np.flatnonzero(live & np.isin(ids, resume_ids)))
+            self._append(vectors_path, vectors.astype(np.float32))
+            self._append(ids_path, np.asarray(resume_ids, dtype=np.int64))
+
+    def remove(self, resume_ids: Optional[List[int]] = None):
+        """Tombstone vectors for the given resumes, or every vector when resume_ids is None."""
+        if resume_ids is not None and not len(resume_ids):
+            return
+        with self._locked():
+            _, ids, live = self._snapshot()
+            dead = live if resume_ids is None else live & np.isin(ids, list(resume_ids))
+            self._tombstone(np.flatnonzero(dead))
+            vectors, ids, live = self._snapshot()
+            if len(ids) and (len(ids) - live.sum()) > EMBEDDING_COMPACT_RATIO * len(ids):
+                # Compact: rewrite only the live rows into a new generation
+                self._switch_generation(np.asarray(vectors[live]), ids[live])
+
+    def stored_ids(self) -> set:
+        with self.lock:
+            _, ids, live = self._snapshot()
+            return set(ids[live].tolist())
+
+    def similarities(self, queries: List[str], resume_ids: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (resume IDs, len(queries) x len(IDs) cosine similarities) over live rows, optionally
+        restricted to resume_ids. All queries share one pass over the mapped matrix.
+        """
+        query_vectors = self.embedder.embed(queries)
+        with self.lock:
+            vectors, ids, live = self._snapshot()
+        # Score straight off the mapped pages, then drop dead rows instead of copying live ones
+        scores = np.asarray(query_vectors @ vectors.T)
+        mask = live if resume_ids is None else live & np.isin(ids, resume_ids)
+        return ids[mask], scores[:, mask]
+
+    def rank(self, query: str, top_n: Optional[int] = None, resume_ids: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+        """(resume_id, cosine similarity) pairs, best first, optionally restricted to resume_ids."""
+        ids, scores = self.similarities([query], resume_ids)
+        order = np.argsort(-scores[0], kind="stable")
+        if top_n is not None:
+            order = order[:top_n]
+        return [(int(ids[i]), float(scores[0, i])) for i in order]
+
+def sync_embeddings(db: Session, store: "EmbeddingStore") -> List[int]:
+    """Embed resumes missing from the store and drop vectors for deleted ones; returns the stored resume IDs."""
+    current = {resume_id for (resume_id,) in db.query(Resume.id).all()}
+    stored = store.stored_ids()
+    store.remove(list(stored - current))
+    missing = current - stored
+    if missing:
+        rows = db.query(Resume.id, Resume.raw_text).filter(Resume.id.in_(missing)).all()
+        store.add([resume_id for resume_id, _ in rows], [text for _, text in rows])
+    return sorted(current)
+
+def semantic_candidates(db: Session, job_description: str, top_n: int) -> Optional[List[int]]:
+    """Embedding-based counterpart of candidate_index.prefilter_candidates."""
+    if top_n <= 0 or db.query(Resume).count() <= top_n:
+        return None
+    store = get_embedding_store()
+    sync_embeddings(db, store)
+    return [resume_id for resume_id, _ in store.rank(job_description, top_n=top_n)] or None
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_embedding_store() -> EmbeddingStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore()
+        return _store
@@ -0,0 +1,99 @@
+import re
+import json
+import time
+import asyncio
+import random
+import threading
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """
+    Offline stand-in for genai.GenerativeModel used by benchmarks and local runs.
+    Recognises the extraction, single-scoring and batch-scoring prompts from llm_matcher
+    and answers them deterministically from word overlap, with optional latency and errors.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _should_fail(self):
+        with self._lock:
+            self.calls += 1
+            return self._random.random() < self.error_rate
+
+    def generate_content(self, prompt):
+        fail = self._should_fail()
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("429 Resource has been exhausted (fake)")
+        return FakeResponse(self.respond(prompt))
+
+    async def generate_content_async(self, prompt):
+        fail = self._should_fail()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if fail:
+            raise RuntimeError("429 Resource has been exhausted (fake)")
+        return FakeResponse(self.respond(prompt))
+
+    def respond(self, prompt):
+        if "Candidate Profiles (one JSON object per line)" in prompt:
+            job_description = section(prompt, "**Job Description:**", "**Candidate Profiles")
+            candidates = [json.loads(line) for line in section(prompt, "one JSON object per line):**", None).splitlines() if line.strip()]
+            return json.dumps([
+                dict(candidate_id=c["candidate_id"], **fake_scores(c["profile"], job_description))
+                for c in candidates
+            ])
+        if "**Candidate Profile:**" in prompt:
+            profile = section(prompt, "**Candidate Profile:**", "**Job Description:**")
+            job_description = section(prompt, "**Job Description:**", "**Candidate Profile:**")
+            return json.dumps(fake_scores(profile, job_description))
+        resume_text = section(prompt, "**Candidate Resume (Text):**", "Schema:")
+        return json.dumps(fake_profile(resume_text))
+
+def section(prompt, start, end):
+    # Sections may come in either order, so the end marker only applies when it follows the start
+    body = prompt.split(start, 1)[1] if start in prompt else prompt
+    if end and end in body:
+        body = body.split(end, 1)[0]
+    return body.strip()
+
+def fake_profile(resume_text):
+    lines = [ln.strip() for ln in resume_text.splitlines() if ln.strip()]
+    email = EMAIL_RE.search(resume_text)
+    words = sorted(set(WORD_RE.findall(resume_text.lower())))
+    return {
+        "name": lines[0][:128] if lines else "Not Found",
+        "email": email.group(0) if email else "Not Found",
+        "phone": "Not Found",
+        "skills": [w for w in words if len(w) > 2][:30],
+        "experience": " ".join(lines[1:4]) or "Not Found",
+        "education": "Not Found"
+    }
+
+def fake_scores(profile_text, job_description):
+    profile_words = set(WORD_RE.findall(profile_text.lower()))
+    jd_words = set(WORD_RE.findall(job_description.lower()))
+    overlap = len(profile_words & jd_words) / len(jd_words) if jd_words else 0.0
+    score = round(10.0 * overlap, 1)
+    return {
+        "overall_score": score,
+        "skills_score": score,
+        "experience_score": score,
+        "education_score": score,
+        "strengths": sorted(profile_words & jd_words)[:5],
+        "gaps": sorted(jd_words - profile_words)[:5],
+        "justification": f"Fake model overlap {overlap:.2f}",
+        "recommendation": "Recommended" if score >= 5 else "Maybe"
+    }
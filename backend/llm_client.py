@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import asyncio
+
+from metrics import LLM_REQUESTS, LLM_WAITING, LLM_IN_FLIGHT, timed
+
+from llm_matcher import (
+    get_model, build_extraction_prompt, parse_profile, build_scoring_prompt, parse_scores,
+    error_scores, build_batch_prompt, parse_batch_scores, plan_batches, estimate_tokens,
+    compact_resume_text, compact_job_description,
+)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "10"))
+LLM_RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "5"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30.0"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60.0"))
+
+# Substrings of provider errors that are worth retrying (rate limits, overload, timeouts)
+RETRYABLE_MARKERS = ("429", "500", "502", "503", "504", "exhausted", "unavailable", "deadline", "timeout", "overloaded")
+
+class LLMCallFailed(Exception):
+    def __init__(self, error, attempts):
+        super().__init__(str(error))
+        self.error = error
+        self.attempts = attempts
+
+def is_retryable(error) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ValueError)):
+        # ValueError covers unparseable JSON replies, which usually succeed on a second try
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    # Full jitter: uniform in [0, min(cap, base * 2^(attempt-1))]
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+class TokenBucket:
+    """Async token bucket: refills `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncLLMClient:
+    """
+    Async wrapper around a generative model with a concurrency limit, a token-bucket
+    rate limiter, jittered exponential backoff and a per-call deadline.
+    Any object exposing generate_content_async (Gemini, fake_llm.FakeModel) works as the model;
+    models with only a blocking generate_content are run in a worker thread.
+    """
+
+    def __init__(self, model=None, max_concurrency=None, rate_per_second=None, burst=None,
+                 max_retries=None, backoff_base=None, backoff_max=None, timeout=None):
+        self.model = model or get_model()
+        self.semaphore = asyncio.Semaphore(max_concurrency or LLM_MAX_CONCURRENCY)
+        self.rate_limiter = TokenBucket(
+            LLM_RATE_PER_SECOND if rate_per_second is None else rate_per_second,
+            burst or LLM_RATE_BURST,
+        )
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = LLM_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = LLM_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.timeout = timeout or LLM_CALL_TIMEOUT
+        self.loop = None
+
+    async def _call_model(self, prompt):
+        if hasattr(self.model, "generate_content_async"):
+            response = await self.model.generate_content_async(prompt)
+        else:
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response
+
+    async def generate(self, prompt, parse=None, usage=None):
+        """
+        Send `prompt`, retrying retryable failures; `parse` is applied inside the retry loop.
+        Every attempt that reaches the model is counted in `usage` (see new_token_usage).
+        Returns (parsed_or_text, attempts). Raises LLMCallFailed once retries are exhausted.
+        """
+        attempts = 0
+        while True:
+            attempts += 1
+            response, text, sent = None, "", False
+            try:
+                with LLM_WAITING.track(), timed("llm_queue_wait"):
+                    await self.rate_limiter.acquire()
+                    await self.semaphore.acquire()
+                try:
+                    sent = True
+                    with LLM_IN_FLIGHT.track(), timed("llm_call"):
+                        response = await asyncio.wait_for(self._call_model(prompt), timeout=self.timeout)
+                finally:
+                    self.semaphore.release()
+                text = response.text
+                with timed("json_parse"):
+                    parsed = parse(text) if parse else text
+                LLM_REQUESTS.inc("ok")
+                return parsed, attempts
+            except Exception as error:
+                LLM_REQUESTS.inc("error")
+                if attempts > self.max_retries or not is_retryable(error):
+                    raise LLMCallFailed(error, attempts)
+                await asyncio.sleep(backoff_delay(attempts, self.backoff_base, self.backoff_max))
+            finally:
+                if usage is not None and sent:
+                    record_usage(usage, prompt, response, text)
+
+def new_token_usage() -> dict:
+    """Per-request token accounting filled in by AsyncLLMClient.generate and the prompt builders' callers."""
+    return {"requests": 0, "prompt_tokens": 0, "response_tokens": 0, "tokens_saved": 0}
+
+def record_usage(usage, prompt, response=None, text=""):
+    # Provider counts when the response carries usage metadata (Gemini does), estimates otherwise
+    metadata = getattr(response, "usage_metadata", None)
+    usage["requests"] += 1
+    usage["prompt_tokens"] += getattr(metadata, "prompt_token_count", None) or estimate_tokens(prompt)
+    usage["response_tokens"] += getattr(metadata, "candidates_token_count", None) or (estimate_tokens(text) if text else 0)
+
+def record_savings(usage, raw, compacted, requests=1):
+    """Tokens compaction kept out of `requests` prompts that would otherwise carry `raw`."""
+    if usage is not None:
+        usage["tokens_saved"] += max(0, estimate_tokens(raw) - estimate_tokens(compacted)) * requests
+
+def outcome_status(attempts: int) -> str:
+    return "scored" if attempts == 1 else "retried"
+
+async def extract_profile(client: AsyncLLMClient, resume_text, usage=None):
+    """
+    Stage one: extract the JD-independent candidate profile from a resume.
+    Runs once per resume at upload time. Returns None if extraction fails.
+    """
+    compacted = compact_resume_text(resume_text)
+    record_savings(usage, resume_text, compacted)
+    try:
+        profile, _ = await client.generate(build_extraction_prompt(compacted), parse=parse_profile, usage=usage)
+        return profile
+    except LLMCallFailed as error:
+        print(f"[Gemini Error] {str(error)}")
+        return None
+
+async def score_profile(client: AsyncLLMClient, profile, job_description, usage=None):
+    """
+    Stage two: score an extracted profile against a job description.
+    Returns (result, status) where status is scored / retried / failed.
+    """
+    try:
+        result, attempts = await client.generate(
+            build_scoring_prompt(profile, job_description),
+            parse=lambda text: parse_scores(profile, text),
+            usage=usage,
+        )
+        return result, outcome_status(attempts)
+    except LLMCallFailed as error:
+        print(f"[Gemini Error] {str(error)}")
+        return error_scores(profile, error, failed=False), "failed"
+
+async def score_batch(client: AsyncLLMClient, batch, job_description, usage=None):
+    """
+    Score a planned batch in one request; candidates the reply misses fall back to single calls.
+    Returns candidate_id -> (result, status).
+    """
+    outcomes = {}
+    try:
+        results, attempts = await client.generate(
+            build_batch_prompt(batch, job_description),
+            parse=lambda text: parse_batch_scores(batch, text),
+            usage=usage,
+        )
+        outcomes = {candidate_id: (result, outcome_status(attempts)) for candidate_id, result in results.items()}
+    except LLMCallFailed as error:
+        print(f"[Gemini Error] batch of {len(batch)} failed, falling back to single calls: {str(error)}")
+
+    missing = [(candidate_id, profile) for candidate_id, profile in batch if candidate_id not in outcomes]
+    singles = await asyncio.gather(*[score_profile(client, profile, job_description, usage) for _, profile in missing])
+    for (candidate_id, _), (result, status) in zip(missing, singles):
+        # A single-call fallback after a batch miss counts as a retry
+        outcomes[candidate_id] = (result, "retried" if status == "scored" else status)
+    return outcomes
+
+async def score_single(client: AsyncLLMClient, candidate_id, profile, job_description, usage=None):
+    return {candidate_id: await score_profile(client, profile, job_description, usage)}
+
+async def iter_scored_profiles(client: AsyncLLMClient, items, job_description, batch_scoring=True, usage=None):
+    """Yield (candidate_id, (result, status)) as soon as the batch or single call holding it completes."""
+    # Compacted once here; the prompt builders find it already within budget
+    compacted = compact_job_description(job_description)
+    if batch_scoring:
+        tasks = [
+            asyncio.ensure_future(score_batch(client, batch, compacted, usage))
+            for batch in plan_batches(items, compacted)
+        ]
+    else:
+        tasks = [
+            asyncio.ensure_future(score_single(client, candidate_id, profile, compacted, usage))
+            for candidate_id, profile in items
+        ]
+    record_savings(usage, job_description, compacted, requests=len(tasks))
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for candidate_id, outcome in (await next_done).items():
+                yield candidate_id, outcome
+    finally:
+        # Stop outstanding calls if the consumer goes away (e.g. a closed stream)
+        for task in tasks:
+            task.cancel()
+
+_client = None
+
+def get_llm_client() -> AsyncLLMClient:
+    """Shared client for the running event loop, so the limits apply across concurrent requests."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.loop is not loop:
+        _client = AsyncLLMClient()
+        _client.loop = loop
+    return _client
@@ -4,6 +4,159 @@ import json
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+MODEL_NAME = "gemini-2.0-flash-exp"
+# Bump whenever the prompt or the parsed output shape changes so cached scores are invalidated
+PROMPT_VERSION = "4"
+
+# Batched scoring packs several profiles into one request until this many prompt tokens
+BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000"))
+MAX_BATCH_SIZE = int(os.getenv("LLM_MAX_BATCH_SIZE", "20"))
+# Resume text and JDs are compacted and cut to these many estimated tokens before they enter a prompt
+RESUME_TOKEN_BUDGET = int(os.getenv("LLM_RESUME_TOKEN_BUDGET", "1500"))
+JD_TOKEN_BUDGET = int(os.getenv("LLM_JD_TOKEN_BUDGET", "800"))
+
+# Every prompt opens with this exact text and keeps per-request content (JD, profile, resume) last,
+# so the provider's prefix / context caching can reuse it across requests. Versioned with the prompts.
+PROMPT_PREFIX = f"""Resume screening prompt v{PROMPT_VERSION}.
+You are an experienced recruiter. Respond with valid JSON only (no markdown, no comments).
+Use 'Not Found' or [] for missing data. Scores are floats between 0 and 10.
+Recommendation is one of: Highly Recommended / Recommended / Maybe / Not Recommended.
+"""
+
+ANALYSIS_INSTRUCTIONS = PROMPT_PREFIX + """
+Task: extract the candidate's details from the resume and score their fit for the job description
+on skills, experience, education and overall, judging context rather than keyword overlap.
+List the main strengths and gaps and justify the scores in one or two sentences.
+
+Schema:
+{"name": "Full Name", "email": "email@example.com", "phone": "+1234567890", "skills": ["Python"],
+ "experience": "Roles, organizations, timelines and key contributions", "education": "Degrees, institutions, certifications",
+ "overall_score": 8.3, "skills_score": 8.5, "experience_score": 8.0, "education_score": 7.5,
+ "strengths": ["..."], "gaps": ["..."], "justification": "...", "recommendation": "Recommended"}
+"""
+
+EXTRACTION_INSTRUCTIONS = PROMPT_PREFIX + """
+Task: extract the candidate's details from the resume.
+
+Schema:
+{"name": "Full Candidate Name", "email": "email@example.com", "phone": "+1234567890", "skills": ["Python", "React"],
+ "experience": "Roles, organizations, timelines and key contributions in one paragraph",
+ "education": "Degrees, institutions, majors and certifications in one sentence"}
+"""
+
+SCORING_INSTRUCTIONS = PROMPT_PREFIX + """
+Task: score the candidate profile against the job description.
+
+Schema:
+{"overall_score": 8.3, "skills_score": 8.5, "experience_score": 8.0, "education_score": 7.5,
+ "strengths": ["..."], "gaps": ["..."], "justification": "One or two sentences", "recommendation": "Recommended"}
+"""
+
+BATCH_SCORING_INSTRUCTIONS = PROMPT_PREFIX + """
+Task: score every candidate profile against the job description.
+Respond with a JSON array, one object per candidate, echoing its candidate_id.
+
+Object schema:
+{"candidate_id": 0, "overall_score": 8.3, "skills_score": 8.5, "experience_score": 8.0, "education_score": 7.5,
+ "strengths": ["..."], "gaps": ["..."], "justification": "One or two sentences", "recommendation": "Recommended"}
+"""
+
+BULLET_RE = re.compile(r"^[•●▪◦■➢►✓✔*\-–—]+\s*")
+SEPARATOR_RE = re.compile(r"^[\W_]+$")
+# Section headings whose content never affects screening
+BOILERPLATE_HEADING_RE = re.compile(
+    r"^(references?|referees|hobbies|interests|hobbies (and|&) interests|personal interests|declaration)\s*:?$", re.I
+)
+# Headings that end a skipped boilerplate section
+SECTION_HEADING_RE = re.compile(
+    r"^(summary|profile|objective|about me|(work |professional )?experience|employment( history)?|education|"
+    r"(technical |key )?skills|projects|certifications?|publications|awards|achievements|languages|"
+    r"volunteering|volunteer experience|training|courses|contact)\s*:?$", re.I
+)
+# Most lines a boilerplate section may drop before the rest is kept regardless
+BOILERPLATE_MAX_LINES = 10
+# Words of a Title Case heading such as "Work History" or "Tools & Platforms"
+HEADING_WORDS_RE = re.compile(r"^[A-Z&][\w&/'-]*$|^(and|of|for|&)$")
+BOILERPLATE_LINE_RE = re.compile(
+    r"^(page \d+( of \d+)?|\d{1,3}|- ?\d+ ?-|curriculum vitae|resume|r[eé]sum[eé]|"
+    r"references? (are )?(available )?(up)?on request\.?|i hereby declare.*|.*equal opportunity employer.*)$", re.I
+)
+
+def normalize_prompt_text(text):
+    """Collapse whitespace, unify bullets and drop empty, separator and page-number lines."""
+    lines = []
+    for line in (text or "").replace("\u00a0", " ").replace("\u200b", "").splitlines():
+        line = " ".join(line.split())
+        if not line or SEPARATOR_RE.match(line):
+            continue
+        line = BULLET_RE.sub("- ", line)
+        if BOILERPLATE_LINE_RE.match(line):
+            continue
+        lines.append(line)
+    return lines
+
+def is_heading_like(line):
+    """A known section heading, or a short all-caps / Title Case line without sentence punctuation."""
+    if SECTION_HEADING_RE.match(line):
+        return True
+    text = line[:-1].rstrip() if line.endswith(":") else line
+    words = text.split()
+    if not words or len(words) > 4 or re.search(r"[.,;!?@|()\d]", text):
+        return False
+    return text.isupper() or line.endswith(":") or (len(words) >= 2 and all(HEADING_WORDS_RE.match(w) for w in words))
+
+def truncate_lines(lines, token_budget):
+    """Keep whole lines from the top until the budget is spent, noting how many were cut."""
+    if estimate_tokens("\n".join(lines)) <= token_budget:
+        return lines
+    # Leave room for the truncation note itself
+    remaining = token_budget * 4 - 40
+    kept = []
+    for line in lines:
+        remaining -= len(line) + 1
+        if remaining < 0:
+            break
+        kept.append(line)
+    if not kept:
+        # A single overlong line (e.g. text extracted without line breaks) is cut mid-line
+        return [lines[0][:max(0, token_budget * 4 - 40)], "[truncated]"]
+    return kept + [f"[{len(lines) - len(kept)} more lines truncated]"]
+
+def compact_resume_text(resume_text, token_budget=None):
+    """
+    Prompt-ready resume text: normalized whitespace, boilerplate sections (references, hobbies,
+    declarations) and page furniture removed, then cut at a line boundary to the token budget.
+    The top of a resume (contact, summary, recent roles) is what survives truncation.
+    """
+    token_budget = token_budget or RESUME_TOKEN_BUDGET
+    kept, skipped = [], None
+    for line in normalize_prompt_text(resume_text):
+        if BOILERPLATE_HEADING_RE.match(line):
+            skipped = 0
+            continue
+        if skipped is not None:
+            # Any heading ends the skip, and so does the cap, so a missed heading cannot drop the rest of the resume
+            if is_heading_like(line) or skipped >= BOILERPLATE_MAX_LINES:
+                skipped = None
+            else:
+                skipped += 1
+                continue
+        kept.append(line)
+    return "\n".join(truncate_lines(kept, token_budget))
+
+def compact_job_description(job_description, token_budget=None):
+    """Normalized JD cut to the token budget; compacting an already compact JD returns it unchanged."""
+    return "\n".join(truncate_lines(normalize_prompt_text(job_description), token_budget or JD_TOKEN_BUDGET))
+
+def build_analysis_prompt(resume_text, job_description):
+    return f"""{ANALYSIS_INSTRUCTIONS}
+**Job Description:**
+{compact_job_description(job_description)}
+
+**Candidate Resume (Text):**
+{compact_resume_text(resume_text)}
+"""
+
 def analyze_resume_fit(resume_text, job_description):
     """
     Function: Analyze resume and match it with the given job description.
@@ -13,82 +166,12 @@ def analyze_resume_fit(resume_text, job_description):
     load_dotenv()
     genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-    # Construct prompt for Gemini
-    analysis_prompt = f"""
-        analysis_prompt = f"""
-    You are an experienced recruiter and talent evaluator.
-    Carefully review the following candidate resume and job description.
-    Extract structured insights, assess compatibility, and respond with a valid JSON report only.
-
-    ---
-
-    **Candidate Resume (Text):**
-    {resume_text}
-
-    **Job Description Provided:**
-    {job_description}
-
-    ---
-
-    ### TASK OBJECTIVES
-
-    1. **Information Extraction**
-       - Identify all technical, analytical, and interpersonal skills.
-       - Summarize professional experience: roles, organizations, timelines, and key contributions.
-       - Include educational background with degrees, institutions, majors, and certifications.
-
-    2. **Relevance Evaluation & Scoring**
-       - Assign numeric values between 0–10 for:
-         - skills_score
-         - experience_score
-         - education_score
-         - overall_score
-       - Focus on contextual understanding rather than mere keyword overlap.
-
-    3. **Comprehensive Review**
-       - Highlight main strengths and improvement areas.
-       - Give a concise justification for the evaluation.
-       - Conclude with a hiring recommendation: Highly Recommended / Recommended / Maybe / Not Recommended.
-
-    ---
-
-    ### EXPECTED OUTPUT
-
-    Provide strictly JSON output following this schema:
-    {{
-      "name": "Full Candidate Name or 'Not Found'",
-      "email": "email@example.com or 'Not Found'",
-      "phone": "+1234567890 or 'Not Found'",
-      "skills": ["Python", "React", "Machine Learning", "AWS", "Communication"],
-      "experience": "Worked as Software Engineer at TechCorp (2019–2024): Built scalable ML pipelines. Prior role as Data Analyst at StartupXYZ (2017–2019).",
-      "education": "B.Tech in Computer Science, MIT, 2017; AWS Solutions Architect Certificate, 2022.",
-      "overall_score": 8.3,
-      "skills_score": 8.5,
-      "experience_score": 8.0,
-      "education_score": 7.5,
-      "strengths": [
-        "Strong Python and ML background",
-        "Hands-on cloud experience",
-        "Good match for listed technologies"
-      ],
-      "gaps": [
-        "Missing Kubernetes experience",
-        "Limited leadership exposure"
-      ],
-      "justification": "Candidate aligns well with core technical requirements, though lacks some management and containerization experience.",
-      "recommendation": "Recommended"
-    }}
-
-    ### IMPORTANT GUIDELINES
-    - Return *only* the JSON (no markdown, quotes, or comments)
-    - All numerical values must be floats (e.g., 8.0)
-    - If any data is unavailable, use 'Not Found' or an empty array []
-    - Maintain logical, consistent scoring throughout
-    """
+    # Construct prompt for Gemini from the compacted resume and JD
+    analysis_prompt = build_analysis_prompt(resume_text, job_description)
 
     try:
         # Call Gemini model
-        model = genai.GenerativeModel("gemini-2.0-flash-exp")
+        model = genai.GenerativeModel(MODEL_NAME)
         output = model.generate_content(analysis_prompt)
         raw_response = output.text.strip()
 
@@ -135,3 +218,147 @@ def analyze_resume_fit(resume_text, job_description):
             "justification": f"Error: {str(error)}",
             "recommendation": "Needs Manual Review"
         }
+
+def get_model():
+    load_dotenv()
+    # LLM_BACKEND=fake swaps in the deterministic offline model (see fake_llm.py)
+    if os.getenv("LLM_BACKEND", "gemini").lower() == "fake":
+        from fake_llm import FakeModel
+        return FakeModel()
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(MODEL_NAME)
+
+def parse_json_response(raw_response):
+    raw_response = raw_response.strip()
+    if raw_response.startswith("```"):
+        raw_response = re.sub(r"```json\n?|\n?```", "", raw_response).strip()
+    return json.loads(raw_response)
+
+def build_extraction_prompt(resume_text):
+    return f"""{EXTRACTION_INSTRUCTIONS}
+**Candidate Resume (Text):**
+{compact_resume_text(resume_text)}
+"""
+
+def parse_profile(raw_response):
+    parsed_data = parse_json_response(raw_response)
+    return {
+        "name": parsed_data.get("name", "Not Found"),
+        "email": parsed_data.get("email", "Not Found"),
+        "phone": parsed_data.get("phone", "Not Found"),
+        "skills": parsed_data.get("skills", []),
+        "experience": parsed_data.get("experience", "Not Found"),
+        "education": parsed_data.get("education", "Not Found"),
+    }
+
+def format_profile(profile):
+    return (
+        f"Skills: {', '.join(profile.get('skills') or [])}\n"
+        f"Experience: {profile.get('experience') or 'Not Found'}\n"
+        f"Education: {profile.get('education') or 'Not Found'}"
+    )
+
+def build_scoring_prompt(profile, job_description):
+    # The JD precedes the profile so requests for the same JD share a longer cacheable prefix
+    return f"""{SCORING_INSTRUCTIONS}
+**Job Description:**
+{compact_job_description(job_description)}
+
+**Candidate Profile:**
+{format_profile(profile)}
+"""
+
+def has_numeric_score(parsed_data):
+    # bool is an int subclass but never a valid score
+    score = parsed_data.get("overall_score")
+    return isinstance(score, (int, float)) and not isinstance(score, bool)
+
+def parse_scores(profile, raw_response):
+    """Scores from a single-profile reply; a reply without a numeric overall_score raises ValueError so it is retried."""
+    parsed_data = parse_json_response(raw_response)
+    if not isinstance(parsed_data, dict) or not has_numeric_score(parsed_data):
+        raise ValueError("score response has no numeric overall_score")
+    return merge_profile_scores(profile, parsed_data)
+
+def error_scores(profile, error, failed=True):
+    return merge_profile_scores(profile, {
+        "overall_score": 0.0,
+        "skills_score": 0.0,
+        "experience_score": 0.0,
+        "education_score": 0.0,
+        "strengths": ["Error analyzing resume"],
+        "gaps": ["Error analyzing resume"],
+        "justification": f"Error: {str(error)}",
+        "recommendation": "Needs Manual Review"
+    }, failed=failed)
+
+def merge_profile_scores(profile, parsed_data, failed=False):
+    """Combine a stage-one profile with stage-two scores into the analyze_resume_fit shape."""
+    return {
+        "name": "Error" if failed else profile.get("name", "Not Found"),
+        "email": profile.get("email", "Not Found"),
+        "phone": profile.get("phone", "Not Found"),
+        "skills": profile.get("skills", []),
+        "experience": profile.get("experience", "Not Found"),
+        "education": profile.get("education", "Not Found"),
+        "overall_score": parsed_data.get("overall_score", 5.0),
+        "skills_score": parsed_data.get("skills_score", 5.0),
+        "experience_score": parsed_data.get("experience_score", 5.0),
+        "education_score": parsed_data.get("education_score", 5.0),
+        "strengths": parsed_data.get("strengths", []),
+        "gaps": parsed_data.get("gaps", []),
+        "justification": parsed_data.get("justification", "Analysis not available"),
+        "recommendation": parsed_data.get("recommendation", "Needs Review")
+    }
+
+def estimate_tokens(text):
+    # Rough heuristic (~4 characters per token) that avoids a count_tokens round trip
+    return max(1, len(text or "") // 4)
+
+def format_batch_candidate(candidate_id, profile):
+    return json.dumps({"candidate_id": candidate_id, "profile": format_profile(profile)})
+
+def plan_batches(items, job_description, token_budget=None, max_batch_size=None):
+    """
+    Split (candidate_id, profile) pairs into batches whose prompts fit the token budget.
+    The JD and instructions are counted once per batch.
+    """
+    token_budget = token_budget or BATCH_TOKEN_BUDGET
+    max_batch_size = max_batch_size or MAX_BATCH_SIZE
+    fixed_cost = estimate_tokens(BATCH_SCORING_INSTRUCTIONS) + estimate_tokens(compact_job_description(job_description))
+    batches, current, used = [], [], fixed_cost
+    for candidate_id, profile in items:
+        cost = estimate_tokens(format_batch_candidate(candidate_id, profile))
+        if current and (used + cost > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, used = [], fixed_cost
+        current.append((candidate_id, profile))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def build_batch_prompt(batch, job_description):
+    candidates = "\n".join(format_batch_candidate(candidate_id, profile) for candidate_id, profile in batch)
+    return f"""{BATCH_SCORING_INSTRUCTIONS}
+**Job Description:**
+{compact_job_description(job_description)}
+
+**Candidate Profiles (one JSON object per line):**
+{candidates}
+"""
+
+def parse_batch_scores(batch, raw_response):
+    """Map a batch reply to candidate_id -> result, skipping entries that are missing or malformed."""
+    parsed_data = parse_json_response(raw_response)
+    if not isinstance(parsed_data, list):
+        raise ValueError("batch response is not a JSON array")
+    profiles = dict(batch)
+    results = {}
+    for entry in parsed_data:
+        if not isinstance(entry, dict) or entry.get("candidate_id") not in profiles:
+            continue
+        if not has_numeric_score(entry):
+            continue
+        results[entry["candidate_id"]] = merge_profile_scores(profiles[entry["candidate_id"]], entry)
+    return results
@@ -1,15 +1,29 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, Form, Query, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, load_only, defer
 import os
 from datetime import datetime
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import heapq
+import math
 import hashlib
-from app import extract_text_from_pdf
-from llm_matcher import extract_and_match_raw_text
-from database import init_db, get_db, Resume
+import json
+from pdf_extract import extract_text_async, shutdown_pool, get_upload_budget, PDF_MAX_BYTES
+from llm_client import get_llm_client, extract_profile, iter_scored_profiles, new_token_usage
+from llm_matcher import MODEL_NAME, PROMPT_VERSION, error_scores
+from database import init_db, get_db, bulk_add, bulk_update, DB_WRITE_CHUNK, Resume, MatchJob, MatchJobResult, JobDescription, MatchResult, Session as SessionLocal
+from candidate_index import index_resumes, remove_from_index, index_missing, prefilter_candidates, PREFILTER_TOP_N
+from score_cache import hash_text, normalize_job_description, make_cache_key, get_cached_scores, store_scores, evict_stale_scores
+from embeddings import get_embedding_store, sync_embeddings, semantic_candidates
+from app import ResumePool, recommend
+from match_jobs import MatchJobWorkers, create_job
+from match_results import (
+    get_or_create_job_description, record_match_results, reusable_results, ranked_page, rank_key, tier_rank,
+    format_rank_cursor,
+)
+from metrics import MetricsMiddleware, render_metrics, request_timings, timed
 
 app = FastAPI(title="Smart Resume Screener API - Database Integrated")
 
@@ -20,18 +34,167 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-request stage timings (debug=timing) and the counters behind GET /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Initialize database on startup
 init_db()
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Uploads are parsed from memory; set UPLOAD_RETENTION_DIR to also keep a copy of each PDF on disk
+UPLOAD_RETENTION_DIR = os.getenv("UPLOAD_RETENTION_DIR")
+if UPLOAD_RETENTION_DIR:
+    os.makedirs(UPLOAD_RETENTION_DIR, exist_ok=True)
+
+STREAM_PROGRESS_INTERVAL = float(os.getenv("STREAM_PROGRESS_INTERVAL", "2.0"))
+
+# "llm" scores with Gemini; "local" (keyword/years/education) and "semantic" (embeddings) run offline;
+# "cascade" scores everything locally and sends only the promising candidates to the LLM
+SCORING_MODES = ("llm", "local", "semantic", "cascade")
+# Cascade escalation: a local score at or above this, or a place in the top fraction of the local ranking
+CASCADE_MIN_SCORE = float(os.getenv("CASCADE_MIN_SCORE", "5.0"))
+CASCADE_TOP_FRACTION = float(os.getenv("CASCADE_TOP_FRACTION", "0.1"))
+# How /match picks the top-N candidates that reach the LLM
+PRERANK_MODES = ("terms", "semantic")
+# "replace" drops resumes not in the new batch; "append" adds the batch to the existing pool
+UPLOAD_MODES = ("replace", "append")
+# debug=timing adds the request's per-stage timings to the response
+DEBUG_OPTIONS = ("timing",)
+
+# Columns offline scoring needs per row; raw_text stays in SQLite unless the local pool is rebuilt
+PROFILE_COLUMNS = (Resume.id, Resume.filename, Resume.content_hash, Resume.candidate_name, Resume.email,
+                   Resume.phone, Resume.skills, Resume.experience, Resume.education)
+
+# Page size for GET /resumes when no limit is given, and the largest page any listing returns
+RESUME_PAGE_LIMIT = int(os.getenv("RESUME_PAGE_LIMIT", "100"))
+MAX_PAGE_LIMIT = int(os.getenv("MAX_PAGE_LIMIT", "1000"))
 
-executor = ThreadPoolExecutor(max_workers=10)
+# Last ResumePool built for scoring_mode=local, reused while the stored resumes are unchanged
+_local_pool = (None, None)
+
+@app.on_event("startup")
+async def start_match_workers():
+    # Also picks up jobs interrupted by a previous shutdown or crash
+    match_workers.start()
+
+@app.on_event("shutdown")
+async def stop_background_work():
+    await match_workers.stop()
+    shutdown_pool()
 
 def get_file_hash(content: bytes) -> str:
     return hashlib.md5(content).hexdigest()
 
+def hash_upload(file: UploadFile, chunk_size: int = 1024 * 1024) -> str:
+    # Same digest as get_file_hash, computed without holding the whole file in memory
+    digest = hashlib.md5()
+    file.file.seek(0)
+    for chunk in iter(lambda: file.file.read(chunk_size), b""):
+        digest.update(chunk)
+    file.file.seek(0)
+    return digest.hexdigest()
+
+def upload_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+    # Measure the spooled buffer without reading it into memory
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+def apply_profile(resume: Resume, profile: dict):
+    resume.candidate_name = profile['name']
+    resume.email = profile['email']
+    resume.phone = profile['phone']
+    resume.skills = ", ".join(profile['skills'])
+    resume.experience = profile['experience']
+    resume.education = profile['education']
+    resume.profile_extracted_at = datetime.utcnow()
+
+def profile_from_resume(resume: Resume) -> dict:
+    return {
+        "name": resume.candidate_name,
+        "email": resume.email,
+        "phone": resume.phone,
+        "skills": resume.skills.split(", ") if resume.skills else [],
+        "experience": resume.experience,
+        "education": resume.education
+    }
+
+def candidate_from_result(resume: Resume, result: dict, status: str, cached: bool) -> dict:
+    return {
+        "resume_id": resume.id,
+        "candidate_name": result['name'],
+        "email": result['email'],
+        "phone": result['phone'],
+        "filename": resume.filename,
+        "skills": result['skills'],
+        "overall_score": result['overall_score'],
+        "skills_score": result['skills_score'],
+        "experience_score": result['experience_score'],
+        "education_score": result['education_score'],
+        "strengths": result['strengths'],
+        "gaps": result['gaps'],
+        "justification": result['justification'],
+        "recommendation": result['recommendation'],
+        "status": status,
+        "cached": cached
+    }
+
+def scorer_fingerprint(scoring_mode: str) -> str:
+    """Identifies what produced a stored result; results from another model, prompt or embedder are not reused."""
+    if scoring_mode == "llm":
+        return f"llm:{MODEL_NAME}:{PROMPT_VERSION}"
+    if scoring_mode == "semantic":
+        return f"semantic:{get_embedding_store().embedder.name}"
+    return "local"
+
+def score_offline(job_descriptions: List[str], db: Session, resumes: List[Resume], scoring_mode: str) -> List[List[dict]]:
+    """
+    Score resumes against each JD without the LLM, one result list per JD in the shape
+    score_profile returns. Resume features are built once and shared by every JD.
+    """
+    global _local_pool
+    profiles = [profile_from_resume(r) for r in resumes]
+    if scoring_mode == "local":
+        signature = tuple((r.id, r.content_hash, r.skills) for r in resumes)
+        if _local_pool[0] != signature:
+            texts = dict(db.query(Resume.id, Resume.raw_text).all())
+            docs = [(texts.get(r.id) or "", profile["skills"]) for r, profile in zip(resumes, profiles)]
+            _local_pool = (signature, ResumePool(docs))
+        pool = _local_pool[1]
+        return [
+            [
+                {**profile, **scores, "recommendation": recommend(scores["overall_score"])}
+                for profile, scores in zip(profiles, pool.score(job_description))
+            ]
+            for job_description in job_descriptions
+        ]
+
+    # One matrix product over the memory-mapped store ranks every JD against every resume
+    store = get_embedding_store()
+    sync_embeddings(db, store)
+    ids, scores = store.similarities(job_descriptions, resume_ids=[r.id for r in resumes])
+    columns = {int(resume_id): i for i, resume_id in enumerate(ids)}
+    all_results = []
+    for row in scores:
+        results = []
+        for resume, profile in zip(resumes, profiles):
+            similarity = float(row[columns[resume.id]]) if resume.id in columns else 0.0
+            results.append({
+                **profile,
+                "overall_score": round(10.0 * max(similarity, 0.0), 2),
+                "skills_score": None,
+                "experience_score": None,
+                "education_score": None,
+                "strengths": [],
+                "gaps": [],
+                "justification": f"Semantic similarity {similarity:.3f} to the job description ({store.embedder.name}).",
+                "recommendation": "Needs Review"
+            })
+        all_results.append(results)
+    return all_results
+
 @app.get("/")
 def root(db: Session = Depends(get_db)):
     total_resumes = db.query(Resume).count()
@@ -43,146 +206,850 @@ def root(db: Session = Depends(get_db)):
         "endpoints": {
             "POST /batch-upload": "Upload multiple resumes",
             "POST /match": "Match resumes with job description",
-            "GET /resumes": "Get all stored resumes",
+            "GET /match/stream": "Match resumes, streaming each score as Server-Sent Events",
+            "POST /match-jobs": "Queue a match run in the background",
+            "GET /match-jobs/{id}": "Progress and partial results of a queued match run",
+            "POST /match-multi": "Match resumes against several job descriptions at once",
+            "GET /job-descriptions/{id}/results": "Stored match results for one job description",
+            "GET /resumes": "List stored resumes, paginated with limit/cursor",
             "DELETE /resumes/{id}": "Delete specific resume",
-            "DELETE /resumes": "Clear all resumes from database"
+            "DELETE /resumes": "Clear all resumes from database",
+            "GET /metrics": "Prometheus metrics: per-stage timings, request counts, in-flight gauges"
         }
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def validate_debug(debug: Optional[str]):
+    if debug is not None and debug not in DEBUG_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"debug must be one of {', '.join(DEBUG_OPTIONS)}")
+
+def with_debug(body: dict, debug: Optional[str]) -> dict:
+    if debug == "timing":
+        body["timings"] = request_timings()
+    return body
+
 @app.post("/batch-upload")
-async def batch_upload(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
-    # Clear previously uploaded resumes so new batch replaces prior data
-    try:
-        db.query(Resume).delete()
-        db.commit()
-    except Exception:
-        db.rollback()
+async def batch_upload(files: List[UploadFile] = File(...), mode: str = Form("replace"),
+                       debug: Optional[str] = Form(None), db: Session = Depends(get_db)):
+    if mode not in UPLOAD_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(UPLOAD_MODES)}")
+    validate_debug(debug)
+    start_time = datetime.now()
+
+    # Hash every upload first (streamed in chunks) so duplicates are never parsed or scored twice
+    pdf_files = [f for f in files if f.filename.endswith('.pdf')]
+    hashes = await asyncio.gather(*[asyncio.to_thread(hash_upload, f) for f in pdf_files])
+    file_hashes = dict(zip([id(f) for f in pdf_files], hashes))
+    existing = {
+        r.content_hash: r
+        for r in db.query(Resume).filter(Resume.content_hash.in_(set(hashes))).all()
+    } if hashes else {}
+
+    # The first file with a given hash is processed; later copies wait on its outcome
+    first_seen = {}
 
     async def process_single_file(file):
         if not file.filename.endswith('.pdf'):
             return {"filename": file.filename, "status": "error", "message": "Only PDF files supported"}
         
+        file_hash = file_hashes[id(file)]
+        if file_hash in existing:
+            resume = existing[file_hash]
+            return {
+                "filename": file.filename,
+                "status": "success",
+                "resume_id": resume.id,
+                "text_length": len(resume.raw_text or ""),
+                "deduplicated": True
+            }
+        if file_hash in first_seen:
+            original = await first_seen[file_hash]
+            if original["status"] != "success":
+                return {**original, "filename": file.filename}
+            return {**original, "filename": file.filename, "deduplicated": True}
+        first_seen[file_hash] = asyncio.ensure_future(process_new_file(file, file_hash))
+        return await first_seen[file_hash]
+
+    async def process_new_file(file, file_hash):
         try:
-            # Read file content (using the same method as original)
-            file_content = await file.read()
-            file_hash = get_file_hash(file_content)
+            size = upload_size(file)
+            if size > PDF_MAX_BYTES:
+                return {"filename": file.filename, "status": "error", "message": f"File exceeds {PDF_MAX_BYTES} bytes"}
             
-            # Save temporarily
-            file_path = os.path.join(UPLOAD_DIR, file.filename)
-            with open(file_path, "wb") as buffer:
-                buffer.write(file_content)
+            # Wait for room under the global byte budget before pulling the file into memory
+            async with get_upload_budget().reserve(size):
+                with timed("pdf_read"):
+                    file_content = await file.read()
+                
+                if UPLOAD_RETENTION_DIR:
+                    # Hash prefix keeps concurrent uploads with the same name from clobbering each other
+                    retained_path = os.path.join(UPLOAD_RETENTION_DIR, f"{file_hash}_{os.path.basename(file.filename)}")
+                    with open(retained_path, "wb") as buffer:
+                        buffer.write(file_content)
+                
+                # Extract text straight from the in-memory bytes on the process pool
+                resume_text = await extract_text_async(file_content)
+                del file_content
             
-            try:
-                # Extract text
-                loop = asyncio.get_event_loop()
-                resume_text = await loop.run_in_executor(executor, extract_text_from_pdf, file_path)
-            finally:
-                # Clean up temp file
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+            # Extract the JD-independent profile once; /match only scores it
+            profile = await extract_profile(get_llm_client(), resume_text, usage=token_usage)
             
-            # Save to database
+            # Rows are written together after every file is processed
             new_resume = Resume(
                 filename=file.filename,
+                content_hash=file_hash,
                 raw_text=resume_text,
                 candidate_name="Pending Analysis",
                 created_at=datetime.utcnow()
             )
-            db.add(new_resume)
-            db.commit()
-            db.refresh(new_resume)
+            if profile is not None:
+                apply_profile(new_resume, profile)
+            new_rows.append(new_resume)
             
             return {
                 "filename": file.filename, 
                 "status": "success", 
-                "resume_id": new_resume.id, 
-                "text_length": len(resume_text)
+                "resume_id": None, 
+                "text_length": len(resume_text),
+                "deduplicated": False
             }
         except Exception as e:
-            db.rollback()
             return {"filename": file.filename, "status": "error", "message": str(e)}
 
-    start_time = datetime.now()
+    new_rows = []
+    token_usage = new_token_usage()
     results = await asyncio.gather(*[process_single_file(file) for file in files])
+
+    # Replace the previous batch (keeping re-uploaded resumes) or append to it, and insert new rows in one transaction
+    try:
+        with timed("db_write"):
+            replaced_ids = []
+            if mode == "replace":
+                replaced = db.query(Resume).filter(
+                    (Resume.content_hash.is_(None)) | (Resume.content_hash.notin_(set(hashes)))
+                )
+                replaced_ids = [resume_id for (resume_id,) in replaced.with_entities(Resume.id).all()]
+                remove_from_index(db, replaced_ids)
+                db.query(MatchResult).filter(MatchResult.resume_id.in_(replaced_ids)).delete(synchronize_session=False)
+                replaced.delete(synchronize_session=False)
+            bulk_add(db, new_rows)
+            index_resumes(db, new_rows)
+        with timed("commit"):
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to save resumes: {str(e)}")
+    try:
+        # Embed new resumes now so semantic ranking never waits on them; /match backfills on failure
+        store = get_embedding_store()
+        store.remove(replaced_ids)
+        await asyncio.to_thread(store.add, [row.id for row in new_rows], [row.raw_text for row in new_rows])
+    except Exception as e:
+        print(f"Error embedding resumes: {str(e)}")
+    # IDs exist only after the flush; fill them in for new files and their in-batch copies
+    ids_by_hash = {row.content_hash: row.id for row in new_rows}
+    for file, result in zip(files, results):
+        if result["status"] == "success" and result["resume_id"] is None:
+            result["resume_id"] = ids_by_hash[file_hashes[id(file)]]
     elapsed = (datetime.now() - start_time).total_seconds()
     
     successful_count = len([r for r in results if r["status"] == "success"])
     
-    return {
+    return with_debug({
+        "mode": mode,
         "total_files": len(files),
         "successful": successful_count,
         "failed": len([r for r in results if r["status"] == "error"]),
+        "deduplicated": [r["filename"] for r in results if r.get("deduplicated")],
         "processing_time": f"{elapsed:.2f}s",
+        "token_usage": token_usage,
         "results": results
-    }
+    }, debug)
 
-@app.post("/match")
-async def match_resumes(job_description: str = Form(...), db: Session = Depends(get_db)):
-    resumes = db.query(Resume).all()
-    
-    if not resumes:
-        raise HTTPException(status_code=404, detail="No resumes found. Please upload resumes first.")
+async def extract_missing_profiles(db: Session, client, resumes, usage: Optional[dict] = None) -> List[Resume]:
+    """Extract profiles for resumes uploaded before extraction succeeded; the caller commits."""
+    async def ensure_profile(resume: Resume):
+        if resume.profile_extracted_at is None:
+            profile = await extract_profile(client, resume.raw_text, usage=usage)
+            if profile is not None:
+                apply_profile(resume, profile)
+                return resume
+        return None
 
-    start_time = datetime.now()
+    extracted = [r for r in await asyncio.gather(*[ensure_profile(r) for r in resumes]) if r is not None]
+    # Newly extracted skills feed the term index used by the prefilter
+    index_resumes(db, extracted)
+    return extracted
+
+async def iter_match_results(job_description: str, db: Session, stats: dict, batch_scoring: bool = True,
+                             prefilter_top_n: int = PREFILTER_TOP_N, score_all: bool = False,
+                             scoring_mode: str = "llm", prerank: str = "terms", incremental: bool = True,
+                             exclude_ids: Optional[set] = None, cascade_min_score: float = CASCADE_MIN_SCORE,
+                             cascade_top_fraction: float = CASCADE_TOP_FRACTION, only_ids: Optional[List[int]] = None):
+    """
+    Yield candidate result dicts in completion order: cached pairs first, then each
+    LLM-scored candidate as soon as its batch returns. Fills `stats` with run totals.
+    The offline scoring modes score the whole pool in one pass and never call the LLM.
+    Resumes in exclude_ids count towards the totals but are not scored (used to resume match jobs).
+    With `incremental`, resumes that already have a stored result for this JD and scorer are
+    served from match_results and only the rest are scored.
+    LLM mode scores only_ids, when given, instead of the prefilter's pick; cascade mode uses it for escalations.
+    """
+    if scoring_mode == "cascade":
+        async for candidate in iter_cascade_results(job_description, db, stats, batch_scoring, prefilter_top_n, score_all,
+                                                    incremental, exclude_ids, cascade_min_score, cascade_top_fraction):
+            yield candidate
+        return
+
+    exclude_ids = exclude_ids or set()
+    stats["scoring_mode"] = scoring_mode
+    # Prompt and response tokens spent on this run, plus what prompt compaction saved
+    usage = stats.setdefault("token_usage", new_token_usage())
+    # Scores are kept per (resume, JD, mode) in match_results, so other JDs never overwrite them
+    jd_id = get_or_create_job_description(db, job_description).id
+    # Commit before any await: an open SQLite write transaction would block other sessions' commits
+    db.commit()
+    stats["job_description_id"] = jd_id
+    scorer = scorer_fingerprint(scoring_mode)
+
+    def reuse_stored(resumes: List[Resume]) -> List[Resume]:
+        # Yielded by the caller; returns the resumes that still need scoring
+        stored = reusable_results(db, jd_id, scoring_mode, scorer, [r.id for r in resumes]) if incremental else {}
+        if scoring_mode == "llm":
+            # Results stored for a resume without an extracted profile were scored on an empty profile
+            stored = {r.id: stored[r.id] for r in resumes if r.id in stored and r.profile_extracted_at is not None}
+        stats["reused"] = len(stored)
+        reused.extend(stored.values())
+        fresh = [r for r in resumes if r.id not in stored]
+        stats["fresh"] = len(fresh)
+        return fresh
 
-    async def process_single_resume(resume: Resume):
+    reused = []
+    if scoring_mode != "llm":
+        resumes = db.query(Resume).options(load_only(*PROFILE_COLUMNS)).all()
+        stats.update(total=len(resumes), cache_hits=0, llm_calls=0, prefiltered_out=0)
+        resumes = reuse_stored([r for r in resumes if r.id not in exclude_ids])
+        for candidate in reused:
+            yield candidate
+        with timed(f"{scoring_mode}_scoring"):
+            results = score_offline([job_description], db, resumes, scoring_mode)[0] if resumes else []
+        candidates = [candidate_from_result(r, result, "scored", False) for r, result in zip(resumes, results)]
+        with timed("db_write"):
+            record_match_results(db, jd_id, scoring_mode, scorer, candidates)
+        with timed("commit"):
+            db.commit()
+        for candidate in candidates:
+            yield candidate
+        return
+
+    # Cheap cut before the LLM: only the top-N resumes by JD term overlap (or embedding similarity) are scored
+    index_missing(db)
+    # Release the write lock before scoring; the LLM awaits below must not hold a transaction open
+    with timed("commit"):
+        db.commit()
+    pool_size = db.query(Resume).count()
+    if only_ids is not None:
+        candidate_ids = only_ids
+    elif score_all:
+        candidate_ids = None
+    elif prerank == "semantic":
+        candidate_ids = semantic_candidates(db, job_description, prefilter_top_n)
+    else:
+        candidate_ids = prefilter_candidates(db, job_description, prefilter_top_n)
+    query = db.query(Resume)
+    if candidate_ids is not None:
+        query = query.filter(Resume.id.in_(candidate_ids))
+    resumes = query.all()
+    stats["total"] = len(resumes)
+    stats["prefiltered_out"] = pool_size - len(resumes)
+    resumes = reuse_stored([r for r in resumes if r.id not in exclude_ids])
+    for candidate in reused:
+        yield candidate
+
+    # Look up previously scored (resume, JD) pairs so unchanged pairs skip the LLM
+    jd_hash = hash_text(normalize_job_description(job_description))
+    cache_keys = {}
+    for resume in resumes:
+        resume_hash = hash_text(resume.raw_text)
+        cache_keys[resume.id] = (resume_hash, make_cache_key(resume_hash, jd_hash))
+    cached_results = get_cached_scores(db, [key for _, key in cache_keys.values()])
+    # Scores cached for a resume without an extracted profile were scored on an empty profile; re-extract instead
+    for resume in resumes:
+        if resume.profile_extracted_at is None:
+            cached_results.pop(cache_keys[resume.id][1], None)
+    stats["cache_hits"] = len([key for _, key in cache_keys.values() if key in cached_results])
+    # LLM requests actually sent (profile extraction, scoring batches and retries); set once scoring ends
+    stats["llm_calls"] = 0
+    fresh_entries = []
+    score_updates = []
+    scored_candidates = []
+    client = get_llm_client()
+
+    def flush_updates():
+        # Commit in chunks so a long run persists progress without a commit per resume
+        with timed("db_write"):
+            bulk_update(db, Resume, score_updates)
+            store_scores(db, fresh_entries)
+            record_match_results(db, jd_id, scoring_mode, scorer, scored_candidates)
+        with timed("commit"):
+            db.commit()
+        score_updates.clear()
+        fresh_entries.clear()
+        scored_candidates.clear()
+
+    def process_single_resume(resume: Resume, result: dict, status: str):
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                executor, 
-                extract_and_match_raw_text, 
-                resume.raw_text, 
-                job_description
-            )
-            
-            # Update resume with match results
-            resume.candidate_name = result['name']
-            resume.email = result['email']
-            resume.phone = result['phone']
-            resume.skills = ", ".join(result['skills'])
-            resume.experience = result['experience']
-            resume.education = result['education']
-            resume.match_score = result['overall_score']
-            resume.skills_score = result['skills_score']
-            resume.experience_score = result['experience_score']
-            resume.education_score = result['education_score']
-            resume.justification = result['justification']
-            resume.job_description = job_description
+            resume_hash, cache_key = cache_keys[resume.id]
+            # Failed analyses are not cached so they get retried next time
+            if cache_key not in cached_results and status != "failed":
+                fresh_entries.append({
+                    "cache_key": cache_key,
+                    "resume_hash": resume_hash,
+                    "jd_hash": jd_hash,
+                    "result": result
+                })
             
-            db.commit()
+            # Queue score updates for a bulk write; failed candidates keep their previous scores
+            if status != "failed":
+                score_updates.append({
+                    "id": resume.id,
+                    "match_score": result['overall_score'],
+                    "skills_score": result['skills_score'],
+                    "experience_score": result['experience_score'],
+                    "education_score": result['education_score'],
+                    "justification": result['justification'],
+                    "recommendation": result['recommendation'],
+                    "job_description": job_description
+                })
             
-            return {
-                "resume_id": resume.id,
-                "candidate_name": result['name'],
-                "email": result['email'],
-                "phone": result['phone'],
-                "filename": resume.filename,
-                "skills": result['skills'],
-                "overall_score": result['overall_score'],
-                "skills_score": result['skills_score'],
-                "experience_score": result['experience_score'],
-                "education_score": result['education_score'],
-                "strengths": result['strengths'],
-                "gaps": result['gaps'],
-                "justification": result['justification'],
-                "recommendation": result['recommendation']
-            }
+            candidate = candidate_from_result(resume, result, status, cache_key in cached_results)
+            if status != "failed":
+                scored_candidates.append(candidate)
+            return candidate
         except Exception as e:
             print(f"Error processing resume {resume.id}: {str(e)}")
             return None
 
-    results = await asyncio.gather(*[process_single_resume(resume) for resume in resumes])
-    results = [r for r in results if r is not None]
+    for resume in resumes:
+        cached = cached_results.get(cache_keys[resume.id][1])
+        if cached is not None:
+            candidate = process_single_resume(resume, cached, "scored")
+            if candidate is not None:
+                yield candidate
+
+    pending = {r.id: r for r in resumes if cache_keys[r.id][1] not in cached_results}
+    await extract_missing_profiles(db, client, pending.values(), usage=usage)
+    with timed("commit"):
+        db.commit()
+    # Still without a profile: extraction failed, so there is nothing to score; never cached or recorded
+    for resume in [r for r in pending.values() if r.profile_extracted_at is None]:
+        del pending[resume.id]
+        error = "Profile extraction failed; the resume will be retried on the next match"
+        candidate = process_single_resume(resume, error_scores(profile_from_resume(resume), error, failed=False), "failed")
+        if candidate is not None:
+            yield candidate
+
+    # Batching packs several profiles plus one copy of the JD into each request
+    async for resume_id, (result, status) in iter_scored_profiles(
+        client,
+        [(r.id, profile_from_resume(r)) for r in pending.values()],
+        job_description,
+        batch_scoring=batch_scoring,
+        usage=usage
+    ):
+        candidate = process_single_resume(pending[resume_id], result, status)
+        if candidate is not None:
+            yield candidate
+        if len(score_updates) >= DB_WRITE_CHUNK:
+            flush_updates()
+    stats["llm_calls"] = usage["requests"]
+
+    try:
+        flush_updates()
+        evict_stale_scores(db)
+        with timed("commit"):
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error saving match results: {str(e)}")
+
+def cascade_escalations(candidates: List[dict], min_score: float, top_fraction: float, limit: Optional[int]) -> List[int]:
+    """
+    Resume IDs the cascade sends to the LLM, best local score first: everything scoring at least
+    min_score plus the top_fraction band of the local ranking, capped at `limit` when it is positive.
+    """
+    ranked = sorted(candidates, key=lambda c: (c["overall_score"], c["resume_id"]), reverse=True)
+    band = math.ceil(top_fraction * len(ranked))
+    escalated = [c["resume_id"] for i, c in enumerate(ranked) if i < band or c["overall_score"] >= min_score]
+    # Like PREFILTER_TOP_N in llm mode, a limit of 0 means no cut
+    return escalated[:limit] if limit is not None and limit > 0 else escalated
+
+async def iter_cascade_results(job_description: str, db: Session, stats: dict, batch_scoring: bool,
+                               prefilter_top_n: int, score_all: bool, incremental: bool, exclude_ids: Optional[set],
+                               min_score: float, top_fraction: float):
+    """
+    Cheap-first cascade: score the whole pool with the local scorer, escalate the candidates
+    cascade_escalations picks to the LLM and yield one merged set where each candidate carries
+    the `tier` that produced its score; Shortlist ranks the llm tier ahead of the local one. Escalations are capped at prefilter_top_n unless score_all.
+    Each tier stores and reuses its results under its own scoring mode in match_results.
+    """
+    exclude_ids = exclude_ids or set()
+    # The whole pool is scored locally, even on a resumed job, so the escalation band stays the same
+    local_stats = {}
+    local = [c async for c in iter_match_results(job_description, db, local_stats, scoring_mode="local", incremental=incremental)]
+    escalated = cascade_escalations(local, min_score, top_fraction, None if score_all else prefilter_top_n)
+    stats.update(
+        scoring_mode="cascade",
+        job_description_id=local_stats["job_description_id"],
+        total=local_stats["total"],
+        prefiltered_out=0,
+        escalated=len(escalated)
+    )
+
+    llm_stats = {}
+    llm_scored = set()
+    if escalated:
+        async for candidate in iter_match_results(job_description, db, llm_stats, batch_scoring=batch_scoring,
+                                                  scoring_mode="llm", incremental=incremental,
+                                                  exclude_ids=exclude_ids, only_ids=escalated):
+            # A failed escalation falls back to its local score below
+            if candidate["status"] != "failed":
+                llm_scored.add(candidate["resume_id"])
+                yield {**candidate, "tier": "llm"}
+    escalated_ids = set(escalated)
+    # reused / freshly scored count the tier each yielded score came from
+    local_reused = local_fresh = 0
+    for candidate in local:
+        if candidate["resume_id"] not in llm_scored and candidate["resume_id"] not in exclude_ids:
+            if candidate["resume_id"] in escalated_ids:
+                yield {**candidate, "tier": "local", "status": "failed"}
+                continue
+            if candidate["cached"]:
+                local_reused += 1
+            else:
+                local_fresh += 1
+            yield {**candidate, "tier": "local"}
+
+    stats.update(
+        cache_hits=llm_stats.get("cache_hits", 0),
+        llm_calls=llm_stats.get("llm_calls", 0),
+        reused=local_reused + llm_stats.get("reused", 0),
+        fresh=local_fresh + llm_stats.get("fresh", 0),
+        token_usage=llm_stats.get("token_usage", new_token_usage())
+    )
+
+def validate_match_options(scoring_mode: str, prerank: str):
+    if scoring_mode not in SCORING_MODES:
+        raise HTTPException(status_code=400, detail=f"scoring_mode must be one of {', '.join(SCORING_MODES)}")
+    if prerank not in PRERANK_MODES:
+        raise HTTPException(status_code=400, detail=f"prerank must be one of {', '.join(PRERANK_MODES)}")
+
+def parse_match_cursor(cursor: str) -> Tuple[int, float, int]:
+    """(tier rank, score, resume_id) from a next_cursor value; cursors without a tier rank as "llm"."""
+    try:
+        *tier, score, resume_id = cursor.split(":")
+        if len(tier) > 1:
+            raise ValueError(cursor)
+        return tier_rank(tier[0] if tier else None), float(score), int(resume_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor must be the next_cursor value from a previous page")
+
+def paginate_candidates(summary: dict, limit: int, cursor: Optional[str]) -> dict:
+    """
+    Keyset page of an already ranked summary: candidates strictly after the (tier, score, resume_id)
+    cursor, at most `limit` of them, plus the cursor for the following page (None on the last one).
+    """
+    candidates = summary["shortlisted_candidates"]
+    if cursor:
+        rank, score, resume_id = parse_match_cursor(cursor)
+        candidates = [c for c in candidates if rank_key(c) < (rank, score, -resume_id)]
+    page = candidates[:limit]
+    last = page[-1] if len(candidates) > limit else None
+    return {
+        **summary,
+        "shortlisted_candidates": page,
+        "next_cursor": format_rank_cursor(last.get("tier"), last['overall_score'], last['resume_id']) if last else None
+    }
+
+class Shortlist:
+    """
+    Running top-K selection over candidates as they arrive. Candidates failing min_score or the
+    recommendation filter are only counted; the rest go through a heap bounded at top_k, so memory
+    and the final sort scale with K rather than with the pool.
+    """
+
+    def __init__(self, top_k: Optional[int] = None, min_score: Optional[float] = None,
+                 recommendations: Optional[List[str]] = None):
+        self.top_k = top_k
+        self.min_score = min_score
+        self.recommendations = {r.lower() for r in recommendations} if recommendations else None
+        self.heap = []
+        self.total = 0
+        self.matched = 0
+        self.outcomes = {"scored": 0, "retried": 0, "failed": 0}
+
+    def add(self, candidate: dict) -> bool:
+        """Count the candidate and keep it if it may be in the top K; returns whether it entered the heap."""
+        self.total += 1
+        self.outcomes[candidate['status']] = self.outcomes.get(candidate['status'], 0) + 1
+        if self.min_score is not None and candidate['overall_score'] < self.min_score:
+            return False
+        if self.recommendations is not None and (candidate['recommendation'] or "").lower() not in self.recommendations:
+            return False
+        self.matched += 1
+        # Min-heap on (tier, score, -resume_id): the root is the weakest kept candidate
+        entry = (rank_key(candidate), candidate)
+        if self.top_k is None or len(self.heap) < self.top_k:
+            heapq.heappush(self.heap, entry)
+        elif entry[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+        else:
+            return False
+        return True
+
+    def ranked(self) -> list:
+        # Best first; cascade tiers come first, and resume ID breaks ties so pages have a stable order
+        return [candidate for _, candidate in sorted(self.heap, key=lambda e: e[0], reverse=True)]
+
+class MatchOptions:
+    """Scoring options shared by the match endpoints, validated on construction."""
+
+    def __init__(self, batch_scoring: bool, prefilter_top_n: int, score_all: bool, scoring_mode: str, prerank: str,
+                 incremental: bool, cascade_min_score: float, cascade_top_fraction: float):
+        validate_match_options(scoring_mode, prerank)
+        self.scoring_mode = scoring_mode
+        # iter_match_results keyword arguments; also what a match job stores
+        self.values = {
+            "batch_scoring": batch_scoring,
+            "prefilter_top_n": prefilter_top_n,
+            "score_all": score_all,
+            "scoring_mode": scoring_mode,
+            "prerank": prerank,
+            "incremental": incremental,
+            "cascade_min_score": cascade_min_score,
+            "cascade_top_fraction": cascade_top_fraction
+        }
+
+class ShortlistFilters:
+    """The top_k / min_score / recommendation filters of a match request; one Shortlist per JD."""
+
+    def __init__(self, top_k: Optional[int], min_score: Optional[float], recommendation: Optional[List[str]]):
+        self.top_k = top_k
+        self.min_score = min_score
+        self.recommendation = recommendation
+
+    def new_shortlist(self) -> Shortlist:
+        return Shortlist(self.top_k, self.min_score, self.recommendation)
+
+def match_options_dependency(field):
+    """MatchOptions read from form fields (field=Form) or query parameters (field=Query)."""
+    def dependency(
+        batch_scoring: bool = field(True),
+        prefilter_top_n: int = field(PREFILTER_TOP_N),
+        score_all: bool = field(False),
+        scoring_mode: str = field("llm"),
+        prerank: str = field("terms"),
+        incremental: bool = field(True),
+        cascade_min_score: float = field(CASCADE_MIN_SCORE),
+        cascade_top_fraction: float = field(CASCADE_TOP_FRACTION, ge=0, le=1)
+    ) -> MatchOptions:
+        return MatchOptions(batch_scoring, prefilter_top_n, score_all, scoring_mode, prerank, incremental,
+                            cascade_min_score, cascade_top_fraction)
+    return dependency
+
+def shortlist_filters_dependency(field):
+    """ShortlistFilters read from form fields (field=Form) or query parameters (field=Query)."""
+    def dependency(
+        top_k: Optional[int] = field(None, ge=1),
+        min_score: Optional[float] = field(None),
+        recommendation: Optional[List[str]] = field(None)
+    ) -> ShortlistFilters:
+        return ShortlistFilters(top_k, min_score, recommendation)
+    return dependency
+
+match_form_options = match_options_dependency(Form)
+match_query_options = match_options_dependency(Query)
+shortlist_form_filters = shortlist_filters_dependency(Form)
+shortlist_query_filters = shortlist_filters_dependency(Query)
+
+def build_match_summary(job_description: str, shortlist: Shortlist, stats: dict, elapsed: float):
+    return {
+        "total_candidates": shortlist.total,
+        "matched_filters": shortlist.matched,
+        "job_description": job_description,
+        "processing_time": f"{elapsed:.2f}s",
+        "scoring_mode": stats["scoring_mode"],
+        "cache_hits": stats["cache_hits"],
+        "llm_calls": stats["llm_calls"],
+        "prefiltered_out": stats["prefiltered_out"],
+        "escalated": stats.get("escalated", 0),
+        "reused": stats.get("reused", 0),
+        "freshly_scored": stats.get("fresh", stats["total"]),
+        "token_usage": stats.get("token_usage", new_token_usage()),
+        "outcomes": shortlist.outcomes,
+        "shortlisted_candidates": shortlist.ranked()
+    }
+
+@app.post("/match")
+async def match_resumes(
+    job_description: str = Form(...),
+    options: MatchOptions = Depends(match_form_options),
+    filters: ShortlistFilters = Depends(shortlist_form_filters),
+    limit: Optional[int] = Form(None, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = Form(None),
+    debug: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    validate_debug(debug)
+    if not db.query(Resume).count():
+        raise HTTPException(status_code=404, detail="No resumes found. Please upload resumes first.")
+
+    start_time = datetime.now()
+    stats = {}
+    shortlist = filters.new_shortlist()
+    async for candidate in iter_match_results(job_description, db, stats, **options.values):
+        shortlist.add(candidate)
     elapsed = (datetime.now() - start_time).total_seconds()
     
-    # Sort by overall score
-    results.sort(key=lambda x: x['overall_score'], reverse=True)
-    
+    summary = build_match_summary(job_description, shortlist, stats, elapsed)
+    if limit is None and not cursor:
+        return with_debug(summary, debug)
+    return with_debug(paginate_candidates(summary, limit or MAX_PAGE_LIMIT, cursor), debug)
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/match/stream")
+async def match_resumes_stream(
+    job_description: str,
+    options: MatchOptions = Depends(match_query_options),
+    filters: ShortlistFilters = Depends(shortlist_query_filters),
+    debug: Optional[str] = None
+):
+    """
+    Server-Sent Events variant of /match: a `candidate` event per scored resume that passes the
+    filters and enters the top_k shortlist as soon as it completes (a later, stronger candidate may
+    still push it out; the summary holds the final ranking), `progress` events every STREAM_PROGRESS_INTERVAL seconds, and a final `summary`
+    event carrying the same body /match returns.
+    """
+    validate_debug(debug)
+    db = SessionLocal()
+    if not db.query(Resume).count():
+        db.close()
+        raise HTTPException(status_code=404, detail="No resumes found. Please upload resumes first.")
+
+    async def event_stream():
+        start_time = datetime.now()
+        stats = {}
+        shortlist = filters.new_shortlist()
+        queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for candidate in iter_match_results(job_description, db, stats, **options.values):
+                    await queue.put(candidate)
+            finally:
+                await queue.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                try:
+                    candidate = await asyncio.wait_for(queue.get(), timeout=STREAM_PROGRESS_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield sse_event("progress", {"completed": shortlist.total, "total": stats.get("total", 0)})
+                    continue
+                if candidate is None:
+                    break
+                if shortlist.add(candidate):
+                    yield sse_event("candidate", candidate)
+            await producer
+            elapsed = (datetime.now() - start_time).total_seconds()
+            yield sse_event("progress", {"completed": shortlist.total, "total": stats.get("total", 0)})
+            yield sse_event("summary", with_debug(build_match_summary(job_description, shortlist, stats, elapsed), debug))
+        finally:
+            producer.cancel()
+            db.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+match_workers = MatchJobWorkers(iter_match_results)
+
+@app.post("/match-jobs")
+def submit_match_job(
+    job_description: str = Form(...),
+    options: MatchOptions = Depends(match_form_options),
+    db: Session = Depends(get_db)
+):
+    """Queue a /match run and return its ID at once; poll GET /match-jobs/{id} for progress and results."""
+    if not db.query(Resume).count():
+        raise HTTPException(status_code=404, detail="No resumes found. Please upload resumes first.")
+    job = create_job(db, job_description, options.values)
+    match_workers.notify()
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/match-jobs/{job_id}")
+def get_match_job(
+    job_id: str,
+    min_score: Optional[float] = None,
+    recommendation: Optional[List[str]] = Query(None),
+    limit: int = Query(RESUME_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Job state plus the candidates scored so far, best first, keyset-paginated like /match."""
+    job = db.get(MatchJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Match job not found")
+
+    query = db.query(MatchJobResult).filter(MatchJobResult.job_id == job_id)
+    if min_score is not None:
+        query = query.filter(MatchJobResult.overall_score >= min_score)
+    if recommendation:
+        query = query.filter(MatchJobResult.recommendation.in_(recommendation))
+    rows, next_cursor = ranked_page(query, MatchJobResult, limit, parse_match_cursor(cursor) if cursor else None)
+
     return {
-        "total_candidates": len(results),
-        "job_description": job_description,
+        "job_id": job.id,
+        "status": job.status,
+        "job_description": job.job_description,
+        "options": json.loads(job.options),
+        "progress": {"completed": job.completed or 0, "total": job.total},
+        "stats": json.loads(job.stats) if job.stats else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "shortlisted_candidates": [json.loads(row.result) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+@app.post("/match-multi")
+async def match_multiple_jds(
+    job_descriptions: List[str] = Form(...),
+    options: MatchOptions = Depends(match_form_options),
+    filters: ShortlistFilters = Depends(shortlist_form_filters),
+    debug: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Score the pool against several JDs in one request. The offline modes build resume features
+    once and score every JD against them, skipping results match_results already holds when incremental; LLM and cascade modes extract missing profiles once and then run
+    the JDs concurrently through the shared client, each with its own prefilter and cache lookups.
+    """
+    validate_debug(debug)
+    if not db.query(Resume).count():
+        raise HTTPException(status_code=404, detail="No resumes found. Please upload resumes first.")
+    jds = list(dict.fromkeys(jd for jd in job_descriptions if jd.strip()))
+    if not jds:
+        raise HTTPException(status_code=400, detail="At least one job description is required")
+
+    start_time = datetime.now()
+    scoring_mode = options.scoring_mode
+    runs = []
+    if scoring_mode in ("llm", "cascade"):
+        # Shared per-resume work happens once, before the JDs fan out
+        index_missing(db)
+        missing = db.query(Resume).filter(Resume.profile_extracted_at.is_(None)).all()
+        await extract_missing_profiles(db, get_llm_client(), missing)
+        db.commit()
+
+        async def run_one(job_description: str):
+            # Each JD streams through its own session so their chunked commits stay independent
+            session = SessionLocal()
+            stats = {}
+            shortlist = filters.new_shortlist()
+            try:
+                async for candidate in iter_match_results(job_description, session, stats, **options.values):
+                    shortlist.add(candidate)
+            finally:
+                session.close()
+            return job_description, stats, shortlist
+
+        runs = await asyncio.gather(*[run_one(jd) for jd in jds])
+    else:
+        # Offline scoring is cheap once features are shared, so the resumes any JD still needs are scored in one pass
+        resumes = db.query(Resume).options(load_only(*PROFILE_COLUMNS)).all()
+        scorer = scorer_fingerprint(scoring_mode)
+        jd_ids = [get_or_create_job_description(db, job_description).id for job_description in jds]
+        stored = [
+            reusable_results(db, jd_id, scoring_mode, scorer, [r.id for r in resumes]) if options.values["incremental"] else {}
+            for jd_id in jd_ids
+        ]
+        pending = [r for r in resumes if any(r.id not in found for found in stored)]
+        with timed(f"{scoring_mode}_scoring"):
+            scored = score_offline(jds, db, pending, scoring_mode) if pending else [[] for _ in jds]
+        for job_description, jd_id, found, results in zip(jds, jd_ids, stored, scored):
+            fresh = [candidate_from_result(r, result, "scored", False)
+                     for r, result in zip(pending, results) if r.id not in found]
+            stats = {"scoring_mode": scoring_mode, "job_description_id": jd_id, "total": len(resumes),
+                     "cache_hits": 0, "llm_calls": 0, "prefiltered_out": 0, "reused": len(found), "fresh": len(fresh)}
+            shortlist = filters.new_shortlist()
+            with timed("db_write"):
+                record_match_results(db, jd_id, scoring_mode, scorer, fresh)
+            for candidate in [*found.values(), *fresh]:
+                shortlist.add(candidate)
+            runs.append((job_description, stats, shortlist))
+        with timed("commit"):
+            db.commit()
+    elapsed = (datetime.now() - start_time).total_seconds()
+
+    return with_debug({
+        "scoring_mode": scoring_mode,
         "processing_time": f"{elapsed:.2f}s",
-        "shortlisted_candidates": results
+        "matches": [
+            {"job_description_id": stats["job_description_id"], **build_match_summary(jd, shortlist, stats, elapsed)}
+            for jd, stats, shortlist in runs
+        ]
+    }, debug)
+
+@app.get("/job-descriptions")
+def list_job_descriptions(
+    limit: int = Query(RESUME_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    query = db.query(JobDescription)
+    if cursor is not None:
+        query = query.filter(JobDescription.id > cursor)
+    rows = query.order_by(JobDescription.id).limit(limit + 1).all()
+    return {
+        "next_cursor": rows[limit - 1].id if len(rows) > limit else None,
+        "job_descriptions": [
+            {"id": jd.id, "job_description": jd.text, "created_at": jd.created_at.isoformat() if jd.created_at else None}
+            for jd in rows[:limit]
+        ]
+    }
+
+@app.get("/job-descriptions/{jd_id}/results")
+def get_job_description_results(
+    jd_id: int,
+    scoring_mode: str = "llm",
+    min_score: Optional[float] = None,
+    recommendation: Optional[List[str]] = Query(None),
+    limit: int = Query(RESUME_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Stored scores of every resume matched against one JD, best first."""
+    jd = db.get(JobDescription, jd_id)
+    if not jd:
+        raise HTTPException(status_code=404, detail="Job description not found")
+    query = db.query(MatchResult).filter(MatchResult.jd_id == jd_id, MatchResult.scoring_mode == scoring_mode)
+    if min_score is not None:
+        query = query.filter(MatchResult.overall_score >= min_score)
+    if recommendation:
+        query = query.filter(MatchResult.recommendation.in_(recommendation))
+    rows, next_cursor = ranked_page(query, MatchResult, limit, parse_match_cursor(cursor) if cursor else None)
+    return {
+        "job_description_id": jd.id,
+        "job_description": jd.text,
+        "scoring_mode": scoring_mode,
+        "results": [{**json.loads(row.result), "scored_at": row.scored_at.isoformat() if row.scored_at else None} for row in rows],
+        "next_cursor": next_cursor
     }
 
 @app.delete("/resumes/{resume_id}")
@@ -192,8 +1059,11 @@ def delete_resume(resume_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Resume not found")
     
     filename = resume.filename
+    remove_from_index(db, [resume_id])
+    db.query(MatchResult).filter(MatchResult.resume_id == resume_id).delete(synchronize_session=False)
     db.delete(resume)
     db.commit()
+    get_embedding_store().remove([resume_id])
     
     remaining = db.query(Resume).count()
     return {
@@ -206,8 +1076,11 @@ def delete_resume(resume_id: int, db: Session = Depends(get_db)):
 @app.delete("/resumes")
 def delete_all_resumes(db: Session = Depends(get_db)):
     count = db.query(Resume).count()
+    remove_from_index(db)
+    db.query(MatchResult).delete()
     db.query(Resume).delete()
     db.commit()
+    get_embedding_store().remove()
     
     return {
         "message": f"All {count} resumes deleted successfully", 
@@ -215,10 +1088,23 @@ def delete_all_resumes(db: Session = Depends(get_db)):
     }
 
 @app.get("/resumes")
-def get_all_resumes(db: Session = Depends(get_db)):
-    resumes = db.query(Resume).all()
+def get_all_resumes(
+    limit: int = Query(RESUME_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    # Keyset pagination on the primary key, loading only the listed columns (no text blobs)
+    query = db.query(Resume).options(load_only(
+        Resume.id, Resume.filename, Resume.candidate_name, Resume.email, Resume.match_score, Resume.created_at
+    ))
+    if cursor is not None:
+        query = query.filter(Resume.id > cursor)
+    resumes = query.order_by(Resume.id).limit(limit + 1).all()
+    has_more = len(resumes) > limit
+    resumes = resumes[:limit]
     return {
-        "total": len(resumes),
+        "total": db.query(Resume).count(),
+        "next_cursor": resumes[-1].id if has_more else None,
         "resumes": [
             {
                 "id": r.id,
@@ -234,7 +1120,7 @@ def get_all_resumes(db: Session = Depends(get_db)):
 
 @app.get("/resume/{resume_id}")
 def get_resume_details(resume_id: int, db: Session = Depends(get_db)):
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = db.query(Resume).options(defer(Resume.raw_text)).filter(Resume.id == resume_id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
@@ -252,6 +1138,7 @@ def get_resume_details(resume_id: int, db: Session = Depends(get_db)):
         "experience_score": resume.experience_score,
         "education_score": resume.education_score,
         "justification": resume.justification,
+        "recommendation": resume.recommendation,
         "job_description": resume.job_description,
         "created_at": resume.created_at.isoformat() if resume.created_at else None
     }
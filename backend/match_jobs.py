@@ -0,0 +1,164 @@
+import os
+import json
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Optional
+
+from sqlalchemy import or_, and_, func, update
+from sqlalchemy.orm import Session
+
+from database import MatchJob, MatchJobResult, Session as SessionLocal
+from metrics import timed
+
+MATCH_JOB_WORKERS = int(os.getenv("MATCH_JOB_WORKERS", "1"))
+# How often idle workers look for queued jobs another process may have created
+MATCH_JOB_POLL_INTERVAL = float(os.getenv("MATCH_JOB_POLL_INTERVAL", "5"))
+# A running job whose heartbeat is older than this is treated as interrupted and picked up again
+MATCH_JOB_STALE_SECONDS = float(os.getenv("MATCH_JOB_STALE_SECONDS", "120"))
+# Candidates persisted per checkpoint; a crash loses at most this many scores
+MATCH_JOB_COMMIT_EVERY = int(os.getenv("MATCH_JOB_COMMIT_EVERY", "20"))
+
+# (job_description, db, stats, exclude_ids=..., **options) -> async iterator of candidate dicts
+ScoreCandidates = Callable[..., AsyncIterator[dict]]
+
+def create_job(db: Session, job_description: str, options: dict) -> MatchJob:
+    job = MatchJob(
+        id=uuid.uuid4().hex,
+        job_description=job_description,
+        options=json.dumps(options),
+        status="queued",
+        completed=0,
+        created_at=datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+def claimable(now: datetime):
+    stale = now - timedelta(seconds=MATCH_JOB_STALE_SECONDS)
+    return or_(
+        MatchJob.status == "queued",
+        and_(MatchJob.status == "running", MatchJob.heartbeat_at < stale)
+    )
+
+def claim_next_job(db: Session) -> Optional[str]:
+    """
+    Atomically take the oldest queued (or abandoned running) job. The conditional UPDATE means
+    two workers, even in different processes, never claim the same job.
+    """
+    now = datetime.utcnow()
+    candidates = db.query(MatchJob.id).filter(claimable(now)).order_by(MatchJob.created_at).limit(10).all()
+    for (job_id,) in candidates:
+        claimed = db.execute(
+            update(MatchJob)
+            .where(MatchJob.id == job_id, claimable(now))
+            .values(status="running", heartbeat_at=now, started_at=func.coalesce(MatchJob.started_at, now))
+        )
+        db.commit()
+        if claimed.rowcount == 1:
+            return job_id
+    return None
+
+async def run_job(job_id: str, score_candidates: ScoreCandidates):
+    """Score a claimed job, skipping candidates a previous (interrupted) run already persisted."""
+    db = SessionLocal()
+    job = db.get(MatchJob, job_id)
+    beat = asyncio.ensure_future(heartbeat(job_id))
+    try:
+        done = {resume_id for (resume_id,) in db.query(MatchJobResult.resume_id).filter(MatchJobResult.job_id == job_id)}
+        stats = {}
+        pending = 0
+
+        def checkpoint():
+            job.completed = len(done)
+            job.total = stats.get("total", job.total)
+            job.stats = json.dumps(stats)
+            job.heartbeat_at = datetime.utcnow()
+            with timed("commit"):
+                db.commit()
+
+        options = json.loads(job.options)
+        async for candidate in score_candidates(job.job_description, db, stats, exclude_ids=done, **options):
+            db.add(MatchJobResult(
+                job_id=job_id,
+                resume_id=candidate["resume_id"],
+                overall_score=candidate["overall_score"],
+                recommendation=candidate["recommendation"],
+                tier=candidate.get("tier"),
+                result=json.dumps(candidate)
+            ))
+            done.add(candidate["resume_id"])
+            pending += 1
+            if pending >= MATCH_JOB_COMMIT_EVERY:
+                checkpoint()
+                pending = 0
+        job.status = "completed"
+        job.finished_at = datetime.utcnow()
+        checkpoint()
+    except asyncio.CancelledError:
+        # Shutting down: keep what was scored and hand the job back to the queue
+        db.rollback()
+        job.status = "queued"
+        db.commit()
+        raise
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        beat.cancel()
+        db.close()
+
+async def heartbeat(job_id: str):
+    # Keeps the claim alive through long LLM waits between checkpoints
+    while True:
+        await asyncio.sleep(MATCH_JOB_STALE_SECONDS / 3)
+        db = SessionLocal()
+        try:
+            db.execute(update(MatchJob).where(MatchJob.id == job_id).values(heartbeat_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+class MatchJobWorkers:
+    """In-process workers that drain the match_jobs table; no broker beyond the SQLite database."""
+
+    def __init__(self, score_candidates: ScoreCandidates, workers: int = MATCH_JOB_WORKERS):
+        self.score_candidates = score_candidates
+        self.workers = workers
+        self.tasks = []
+        self.wakeup = None
+
+    def start(self):
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    def notify(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _work(self):
+        while True:
+            # Cleared before looking, so a job submitted during the claim still wakes us
+            self.wakeup.clear()
+            db = SessionLocal()
+            try:
+                job_id = claim_next_job(db)
+            finally:
+                db.close()
+            if job_id is not None:
+                await run_job(job_id, self.score_candidates)
+                continue
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=MATCH_JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
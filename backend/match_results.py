@@ -0,0 +1,98 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
+
+from database import JobDescription, MatchResult, DB_WRITE_CHUNK
+from score_cache import hash_text, normalize_job_description
+
+# Cascade candidates rank by tier first, so a local-only score never outranks an LLM-vetted one;
+# candidates from the single-tier modes carry no tier and rank alongside "llm"
+TIER_RANKS = {"llm": 1, "local": 0}
+
+def tier_rank(tier: Optional[str]) -> int:
+    return TIER_RANKS.get(tier, 1)
+
+def rank_key(candidate: dict) -> Tuple[int, float, int]:
+    """Sort key, highest first: tier, then score, then the lower resume ID."""
+    return tier_rank(candidate.get("tier")), candidate["overall_score"], -candidate["resume_id"]
+
+def format_rank_cursor(tier: Optional[str], score: float, resume_id: int) -> str:
+    return f"{tier}:{score}:{resume_id}" if tier else f"{score}:{resume_id}"
+
+def get_or_create_job_description(db: Session, job_description: str) -> JobDescription:
+    """One row per distinct JD (after whitespace normalisation); flushed so the ID is usable."""
+    jd_hash = hash_text(normalize_job_description(job_description))
+    row = db.query(JobDescription).filter(JobDescription.jd_hash == jd_hash).first()
+    if row is not None:
+        return row
+    try:
+        # Savepoint: a concurrent request inserting the same JD first only undoes this insert
+        with db.begin_nested():
+            row = JobDescription(jd_hash=jd_hash, text=job_description, created_at=datetime.utcnow())
+            db.add(row)
+    except IntegrityError:
+        row = db.query(JobDescription).filter(JobDescription.jd_hash == jd_hash).one()
+    return row
+
+def record_match_results(db: Session, jd_id: int, scoring_mode: str, scorer: str, candidates: List[dict]):
+    """Replace the stored (resume, JD, mode) results for these candidates; the caller commits."""
+    if not candidates:
+        return
+    now = datetime.utcnow()
+    rows = [{
+        "resume_id": c["resume_id"],
+        "jd_id": jd_id,
+        "scoring_mode": scoring_mode,
+        "scorer": scorer,
+        "overall_score": c["overall_score"],
+        "skills_score": c["skills_score"],
+        "experience_score": c["experience_score"],
+        "education_score": c["education_score"],
+        "recommendation": c["recommendation"],
+        "result": json.dumps(c),
+        "scored_at": now
+    } for c in candidates]
+    for start in range(0, len(rows), DB_WRITE_CHUNK):
+        chunk = rows[start:start + DB_WRITE_CHUNK]
+        db.query(MatchResult).filter(
+            MatchResult.jd_id == jd_id,
+            MatchResult.scoring_mode == scoring_mode,
+            MatchResult.resume_id.in_([row["resume_id"] for row in chunk])
+        ).delete(synchronize_session=False)
+        db.execute(insert(MatchResult), chunk)
+
+def reusable_results(db: Session, jd_id: int, scoring_mode: str, scorer: str, resume_ids: List[int]) -> Dict[int, dict]:
+    """Stored candidates for these resumes against this JD that the same scorer produced, by resume ID."""
+    found = {}
+    for start in range(0, len(resume_ids), DB_WRITE_CHUNK):
+        rows = db.query(MatchResult.resume_id, MatchResult.result).filter(
+            MatchResult.jd_id == jd_id,
+            MatchResult.scoring_mode == scoring_mode,
+            MatchResult.scorer == scorer,
+            MatchResult.resume_id.in_(resume_ids[start:start + DB_WRITE_CHUNK])
+        ).all()
+        for resume_id, result in rows:
+            found[resume_id] = {**json.loads(result), "cached": True}
+    return found
+
+def ranked_page(query: Query, model, limit: int, cursor: Optional[Tuple[int, float, int]] = None) -> Tuple[list, Optional[str]]:
+    """
+    Keyset page of result rows ordered by tier (when `model` has a tier column), overall_score
+    desc, resume_id asc. `model` is any table with those columns; returns the rows and the next
+    cursor ("[tier:]score:resume_id" or None).
+    """
+    tier = getattr(model, "tier", None)
+    rank = case(*[(tier == name, value) for name, value in TIER_RANKS.items()], else_=1) if tier is not None else None
+    if cursor is not None:
+        cursor_rank, score, resume_id = cursor
+        after = (model.overall_score < score) | ((model.overall_score == score) & (model.resume_id > resume_id))
+        query = query.filter(after if rank is None else (rank < cursor_rank) | ((rank == cursor_rank) & after))
+    order = [model.overall_score.desc(), model.resume_id]
+    rows = query.order_by(*([rank.desc()] if rank is not None else []), *order).limit(limit + 1).all()
+    last = rows[limit - 1] if len(rows) > limit else None
+    next_cursor = format_rank_cursor(getattr(last, "tier", None), last.overall_score, last.resume_id) if last else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,163 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Histogram buckets in seconds: sub-millisecond DB writes up to minute-long LLM batches
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """Base for the Prometheus text-format metrics below; values are kept per label tuple."""
+
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple[str, ...], object] = {}
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for values, value in sorted(self.values.items()):
+                lines.extend(self.render_value(values, value))
+        return "\n".join(lines)
+
+    def render_value(self, values, value):
+        return [f"{self.name}{format_labels(self.labels, values)} {value}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *values: str, amount: float = 1):
+        with self.lock:
+            self.values[values] = self.values.get(values, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        if not labels:
+            # Unlabelled gauges are exported as 0 before anything is in flight
+            self.values[()] = 0
+
+    def add(self, amount: float, *values: str):
+        with self.lock:
+            self.values[values] = self.values.get(values, 0) + amount
+
+    @contextmanager
+    def track(self, *values: str):
+        """Count the enclosed block as in flight."""
+        self.add(1, *values)
+        try:
+            yield
+        finally:
+            self.add(-1, *values)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets=STAGE_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+
+    def observe(self, amount: float, *values: str):
+        with self.lock:
+            counts, total, observed = self.values.get(values, ((0,) * len(self.buckets), 0.0, 0))
+            counts = tuple(c + (amount <= bound) for c, bound in zip(counts, self.buckets))
+            self.values[values] = (counts, total + amount, observed + 1)
+
+    def render_value(self, values, value):
+        counts, total, observed = value
+        # Buckets are cumulative: each count already includes every observation below its bound
+        bucket_labels = ['le="%s"' % bound for bound in self.buckets] + ['le="+Inf"']
+        lines = [
+            f"{self.name}_bucket{format_labels(self.labels, values, label)} {count}"
+            for label, count in zip(bucket_labels, list(counts) + [observed])
+        ]
+        lines.append(f"{self.name}_sum{format_labels(self.labels, values)} {total}")
+        lines.append(f"{self.name}_count{format_labels(self.labels, values)} {observed}")
+        return lines
+
+STAGE_SECONDS = Histogram(
+    "resume_screener_stage_seconds",
+    "Time spent in each pipeline stage (pdf_read, text_extraction, db_write, llm_queue_wait, llm_call, json_parse, commit, ...)",
+    ("stage",)
+)
+HTTP_REQUESTS = Counter("resume_screener_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_SECONDS = Histogram("resume_screener_http_request_seconds", "HTTP request latency by route", ("method", "route"))
+LLM_REQUESTS = Counter("resume_screener_llm_requests_total", "LLM call attempts by outcome", ("outcome",))
+PDF_IN_FLIGHT = Gauge("resume_screener_pdf_executor_in_flight", "PDF extractions submitted to the process pool and not yet finished")
+LLM_WAITING = Gauge("resume_screener_llm_waiting", "LLM calls waiting on the rate limiter or concurrency semaphore")
+LLM_IN_FLIGHT = Gauge("resume_screener_llm_in_flight", "LLM calls holding the concurrency semaphore")
+REGISTRY = (STAGE_SECONDS, HTTP_REQUESTS, HTTP_SECONDS, LLM_REQUESTS, PDF_IN_FLIGHT, LLM_WAITING, LLM_IN_FLIGHT)
+
+# Stage totals for the current HTTP request; tasks spawned by the request share the same dict
+_request_timings: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_timings", default=None)
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(stage, {"seconds": 0.0, "count": 0})
+        entry["seconds"] += seconds
+        entry["count"] += 1
+
+@contextmanager
+def timed(stage: str):
+    """Time the enclosed block (awaits included) as one occurrence of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+def request_timings() -> dict:
+    """
+    Per-stage totals for the current request, for debug=timing responses. Stages that ran
+    concurrently (e.g. parallel LLM calls) each add their own time, so totals can exceed wall time.
+    """
+    timings = _request_timings.get() or {}
+    return {stage: {"seconds": round(entry["seconds"], 4), "count": entry["count"]} for stage, entry in sorted(timings.items())}
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+class MetricsMiddleware:
+    """ASGI middleware: opens a per-request timing scope and counts requests by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_timings.set({})
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route templates (/resumes/{resume_id}) keep the label set bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+            HTTP_SECONDS.observe(time.perf_counter() - start, scope["method"], route)
+            _request_timings.reset(token)
@@ -0,0 +1,132 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Union
+
+import fitz
+
+from metrics import PDF_IN_FLIGHT, timed
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+# Recycle each worker process after this many files to keep PyMuPDF memory from creeping
+PDF_WORKER_MAX_TASKS = int(os.getenv("PDF_WORKER_MAX_TASKS", "50"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "30"))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(20 * 1024 * 1024)))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "30"))
+# Upper bound on upload bytes held in memory across all in-flight files
+UPLOAD_MEMORY_BUDGET = int(os.getenv("UPLOAD_MEMORY_BUDGET", str(256 * 1024 * 1024)))
+
+PdfSource = Union[str, bytes]
+
+class PdfExtractionError(Exception):
+    pass
+
+def open_pdf(source: PdfSource):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(source), filetype="pdf")
+    return fitz.open(source)
+
+def iter_pdf_pages(source: PdfSource, max_pages: int = PDF_MAX_PAGES, deadline: float = None) -> Iterator[str]:
+    """Yield page text one page at a time, stopping at max_pages or when the deadline passes."""
+    with open_pdf(source) as doc:
+        for index, page in enumerate(doc):
+            if index >= max_pages:
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                raise PdfExtractionError(f"extraction exceeded {PDF_EXTRACT_TIMEOUT:.0f}s after {index} pages")
+            yield page.get_text()
+
+def extract_pdf_text(source: PdfSource, max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS,
+                     timeout: float = PDF_EXTRACT_TIMEOUT) -> str:
+    """Runs inside a worker process: stream pages and stop once the page or character cap is hit."""
+    deadline = time.monotonic() + timeout if timeout else None
+    pages, total = [], 0
+    for text in iter_pdf_pages(source, max_pages=max_pages, deadline=deadline):
+        pages.append(text)
+        total += len(text) + 1
+        if total >= max_chars:
+            break
+    return "\n".join(pages)[:max_chars]
+
+def source_size(source: PdfSource) -> int:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return os.path.getsize(source)
+
+_pool = None
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, max_tasks_per_child=PDF_WORKER_MAX_TASKS)
+    return _pool
+
+def reset_pool():
+    """Tear down the pool, killing any worker stuck on a pathological file."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is None:
+        return
+    for process in list(getattr(pool, "_processes", {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+async def extract_text_async(source: PdfSource, timeout: float = PDF_EXTRACT_TIMEOUT) -> str:
+    """
+    Extract text on the shared process pool. Raises PdfExtractionError for files over
+    PDF_MAX_BYTES or that do not finish within `timeout` seconds.
+    """
+    size = source_size(source)
+    if size > PDF_MAX_BYTES:
+        raise PdfExtractionError(f"file is {size} bytes, limit is {PDF_MAX_BYTES}")
+    loop = asyncio.get_running_loop()
+    try:
+        with PDF_IN_FLIGHT.track(), timed("text_extraction"):
+            future = loop.run_in_executor(get_pool(), extract_pdf_text, source, PDF_MAX_PAGES, PDF_MAX_CHARS, timeout)
+            # Workers enforce the deadline between pages; this outer guard catches a single hung page
+            return await asyncio.wait_for(future, timeout=timeout + 5)
+    except asyncio.TimeoutError:
+        reset_pool()
+        raise PdfExtractionError(f"extraction timed out after {timeout:.0f}s")
+
+class ByteBudget:
+    """Async back-pressure on bytes in flight; a reservation waits until it fits under capacity."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self.condition = asyncio.Condition()
+        self.loop = None
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int):
+        # A single file larger than the whole budget still runs, just on its own
+        nbytes = min(nbytes, self.capacity)
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_use + nbytes <= self.capacity)
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.in_use -= nbytes
+                self.condition.notify_all()
+
+_upload_budget = None
+
+def get_upload_budget() -> ByteBudget:
+    global _upload_budget
+    loop = asyncio.get_running_loop()
+    if _upload_budget is None or _upload_budget.loop is not loop:
+        _upload_budget = ByteBudget(UPLOAD_MEMORY_BUDGET)
+        _upload_budget.loop = loop
+    return _upload_budget
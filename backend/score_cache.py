@@ -0,0 +1,74 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from database import ScoreCache
+from llm_matcher import MODEL_NAME, PROMPT_VERSION
+
+SCORE_CACHE_TTL_HOURS = float(os.getenv("SCORE_CACHE_TTL_HOURS", "168"))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "50000"))
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def normalize_job_description(job_description: str) -> str:
+    return re.sub(r"\s+", " ", job_description or "").strip()
+
+def make_cache_key(resume_hash: str, jd_hash: str, model_name: str = MODEL_NAME,
+                   prompt_version: str = PROMPT_VERSION) -> str:
+    return hash_text(f"{resume_hash}:{jd_hash}:{model_name}:{prompt_version}")
+
+def get_cached_scores(db: Session, keys: List[str]) -> Dict[str, dict]:
+    """Bulk lookup of cached results; expired entries are treated as misses."""
+    if not keys:
+        return {}
+    now = datetime.utcnow()
+    cutoff = now - timedelta(hours=SCORE_CACHE_TTL_HOURS)
+    hits = {}
+    rows = db.query(ScoreCache).filter(ScoreCache.cache_key.in_(set(keys))).all()
+    for row in rows:
+        if row.created_at and row.created_at < cutoff:
+            continue
+        try:
+            hits[row.cache_key] = json.loads(row.result)
+        except (TypeError, ValueError):
+            continue
+        row.last_used_at = now
+    return hits
+
+def store_scores(db: Session, entries: List[dict]):
+    """Insert or refresh cache rows; each entry has cache_key, resume_hash, jd_hash and result."""
+    now = datetime.utcnow()
+    # Identical resume texts share a key; merge() cannot see duplicates that are still pending
+    unique_entries = {entry["cache_key"]: entry for entry in entries}
+    for entry in unique_entries.values():
+        db.merge(ScoreCache(
+            cache_key=entry["cache_key"],
+            resume_hash=entry["resume_hash"],
+            jd_hash=entry["jd_hash"],
+            model_name=entry.get("model_name", MODEL_NAME),
+            prompt_version=entry.get("prompt_version", PROMPT_VERSION),
+            result=json.dumps(entry["result"]),
+            created_at=now,
+            last_used_at=now,
+        ))
+
+def evict_stale_scores(db: Session) -> int:
+    """Drop TTL-expired rows, then the least recently used rows beyond the size cap."""
+    cutoff = datetime.utcnow() - timedelta(hours=SCORE_CACHE_TTL_HOURS)
+    removed = db.query(ScoreCache).filter(ScoreCache.created_at < cutoff).delete(synchronize_session=False)
+    overflow = db.query(ScoreCache).count() - SCORE_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        oldest = (
+            db.query(ScoreCache.cache_key)
+            .order_by(ScoreCache.last_used_at.asc())
+            .limit(overflow)
+            .subquery()
+        )
+        removed += db.query(ScoreCache).filter(ScoreCache.cache_key.in_(oldest.select())).delete(synchronize_session=False)
+    return removed
@@ -0,0 +1,22 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+# The backend is a flat set of modules run from backend/, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules read their configuration at import time: point every database, store and upload
+# directory at a scratch directory and use the offline fake model
+SCRATCH_DIR = tempfile.mkdtemp(prefix="resume-tests-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(SCRATCH_DIR, 'resumes.db')}",
+    APP_DATABASE_URL=f"sqlite:///{os.path.join(SCRATCH_DIR, 'app.db')}",
+    EMBEDDING_DIR=os.path.join(SCRATCH_DIR, "embeddings"),
+    LLM_BACKEND="fake",
+    LLM_RATE_PER_SECOND="0",
+)
+os.environ.pop("UPLOAD_RETENTION_DIR", None)
+os.chdir(SCRATCH_DIR)
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from candidate_index import index_resumes, prefilter_candidates
+from database import Base, Resume, make_engine
+
+TEXTS = ["python spark airflow", "python django", "java spring", "excel accounting", "figma design"]
+
+@pytest.fixture
+def db(tmp_path):
+    bind = make_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    Base.metadata.create_all(bind=bind)
+    session = sessionmaker(bind=bind)()
+    resumes = [Resume(filename=f"{i}.pdf", content_hash=str(i), raw_text=text) for i, text in enumerate(TEXTS)]
+    session.add_all(resumes)
+    session.flush()
+    index_resumes(session, resumes)
+    session.commit()
+    yield session
+    session.close()
+
+def ids_for(db, texts):
+    return [db.query(Resume.id).filter(Resume.raw_text == text).scalar() for text in texts]
+
+def test_prefilter_ranks_by_term_overlap(db):
+    assert prefilter_candidates(db, "python spark engineer", top_n=2) == ids_for(db, ["python spark airflow", "python django"])
+
+def test_prefilter_keeps_only_overlapping_resumes(db):
+    assert prefilter_candidates(db, "spring boot", top_n=2) == ids_for(db, ["java spring"])
+
+def test_prefilter_scores_nothing_when_nothing_overlaps(db):
+    assert prefilter_candidates(db, "welding carpentry plumbing", top_n=2) == []
+
+def test_prefilter_does_not_cut_a_small_pool(db):
+    assert prefilter_candidates(db, "welding", top_n=5) is None
+    assert prefilter_candidates(db, "welding", top_n=0) is None
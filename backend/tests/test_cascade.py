@@ -0,0 +1,120 @@
+import time
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import Shortlist, cascade_escalations, paginate_candidates
+
+JD = "Senior backend engineer: Python, Kafka, AWS, PostgreSQL, Docker, Kubernetes. 5+ years."
+
+def candidate(resume_id, score, tier=None):
+    found = {"resume_id": resume_id, "overall_score": score, "recommendation": "Recommended", "status": "scored"}
+    return {**found, "tier": tier} if tier else found
+
+def test_llm_tier_outranks_higher_local_score():
+    shortlist = Shortlist(top_k=2)
+    for c in (candidate(1, 3.8, "llm"), candidate(2, 4.5, "local"), candidate(3, 2.0, "local")):
+        shortlist.add(c)
+    assert [(c["resume_id"], c["tier"]) for c in shortlist.ranked()] == [(1, "llm"), (2, "local")]
+
+def test_local_candidates_do_not_evict_llm_candidates():
+    shortlist = Shortlist(top_k=2)
+    for c in (candidate(1, 3.0, "llm"), candidate(2, 2.0, "llm"), candidate(3, 9.9, "local")):
+        shortlist.add(c)
+    assert [c["resume_id"] for c in shortlist.ranked()] == [1, 2]
+    assert shortlist.matched == 3
+
+def test_add_reports_whether_candidate_entered_the_heap():
+    shortlist = Shortlist(top_k=2, min_score=2.0)
+    added = [shortlist.add(candidate(i, score)) for i, score in enumerate((5.0, 1.0, 3.0, 2.5, 6.0), start=1)]
+    assert added == [True, False, True, False, True]
+    assert shortlist.matched == 4
+
+def test_untiered_candidates_rank_by_score():
+    shortlist = Shortlist()
+    for c in (candidate(1, 3.0), candidate(2, 7.0), candidate(3, 7.0)):
+        shortlist.add(c)
+    assert [c["resume_id"] for c in shortlist.ranked()] == [2, 3, 1]
+
+def test_cascade_escalations_cap_only_with_positive_limit():
+    pool = [candidate(i, float(i)) for i in range(1, 7)]
+    assert cascade_escalations(pool, 3.0, 0.0, 2) == [6, 5]
+    assert cascade_escalations(pool, 3.0, 0.0, 0) == [6, 5, 4, 3]
+    assert cascade_escalations(pool, 3.0, 0.0, None) == [6, 5, 4, 3]
+
+def test_pagination_follows_tier_order():
+    shortlist = Shortlist()
+    for c in (candidate(1, 3.8, "llm"), candidate(2, 4.5, "local"), candidate(3, 6.0, "llm"), candidate(4, 1.0, "local")):
+        shortlist.add(c)
+    summary = {"shortlisted_candidates": shortlist.ranked()}
+    pages, cursor = [], None
+    while True:
+        page = paginate_candidates(summary, 1, cursor)
+        pages += [c["resume_id"] for c in page["shortlisted_candidates"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [3, 1, 2, 4]
+
+def resume_pdf(lines):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((50, 60 + 14 * i), line, fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+RESUMES = [
+    ["Alice Strong", "alice@example.com", "SKILLS", "Python, Kafka, AWS, PostgreSQL, Docker, Kubernetes",
+     "EXPERIENCE", "8 years backend engineer", "EDUCATION", "B.Tech Computer Science"],
+    ["Bob Middle", "bob@example.com", "SKILLS", "Python, AWS, Docker", "EXPERIENCE", "6 years backend engineer",
+     "EDUCATION", "B.Tech Computer Science"],
+    ["Carol Partial", "carol@example.com", "SKILLS", "Python, PostgreSQL", "EXPERIENCE", "5 years engineer"],
+    ["Dan Light", "dan@example.com", "SKILLS", "Excel", "EXPERIENCE", "2 years analyst"],
+]
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        files = [("files", (f"{i}.pdf", resume_pdf(lines), "application/pdf")) for i, lines in enumerate(RESUMES)]
+        assert client.post("/batch-upload", files=files).json()["successful"] == len(RESUMES)
+        yield client
+
+def test_cascade_match_ranks_llm_tier_first(client):
+    # Only the top local candidate reaches the LLM; every local-only score must still rank below it
+    body = client.post("/match", data={
+        "job_description": JD, "scoring_mode": "cascade", "incremental": "false",
+        "cascade_min_score": "100", "cascade_top_fraction": "0.25", "top_k": "2",
+    }).json()
+    assert body["escalated"] == 1
+    assert [c["tier"] for c in body["shortlisted_candidates"]] == ["llm", "local"]
+
+def test_cascade_match_job_pages_rank_llm_tier_first(client):
+    job = client.post("/match-jobs", data={
+        "job_description": JD, "scoring_mode": "cascade", "incremental": "false",
+        "cascade_min_score": "100", "cascade_top_fraction": "0.5",
+    }).json()
+    for _ in range(200):
+        state = client.get(f"/match-jobs/{job['job_id']}", params={"limit": 1}).json()
+        if state["status"] == "completed":
+            break
+        time.sleep(0.05)
+    assert state["status"] == "completed"
+    tiers, cursor = [], None
+    while True:
+        page = client.get(f"/match-jobs/{job['job_id']}", params={"limit": 1, **({"cursor": cursor} if cursor else {})}).json()
+        tiers += [c["tier"] for c in page["shortlisted_candidates"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert tiers == ["llm", "llm", "local", "local"]
+
+def test_stream_emits_only_shortlisted_candidates(client):
+    params = {"job_description": JD, "scoring_mode": "local", "top_k": 1, "incremental": "false"}
+    with client.stream("GET", "/match/stream", params=params) as response:
+        events = [line.split(": ", 1)[1] for line in response.iter_lines() if line.startswith("event: ")]
+    assert events.count("candidate") < len(RESUMES)
+    assert events[-1] == "summary"
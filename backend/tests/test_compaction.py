@@ -0,0 +1,48 @@
+from llm_matcher import BOILERPLATE_MAX_LINES, compact_resume_text, is_heading_like
+
+def test_title_case_heading_ends_boilerplate_skip():
+    resume = "\n".join([
+        "Jane Doe",
+        "jane@example.com",
+        "Interests",
+        "Chess, hiking and photography",
+        "Work History",
+        "Senior Engineer, Acme Corp (2019-2024)",
+        "Built Kafka pipelines in Python",
+        "Career Highlights",
+        "Led 10 engineers",
+        "Education",
+        "BSc CS",
+    ])
+    compacted = compact_resume_text(resume).splitlines()
+    assert "Chess, hiking and photography" not in compacted
+    assert compacted == [
+        "Jane Doe",
+        "jane@example.com",
+        "Work History",
+        "Senior Engineer, Acme Corp (2019-2024)",
+        "Built Kafka pipelines in Python",
+        "Career Highlights",
+        "Led 10 engineers",
+        "Education",
+        "BSc CS",
+    ]
+
+def test_references_are_dropped_until_next_section():
+    resume = "Jane Doe\nREFERENCES\nDr. John Smith, Professor, MIT\njohn@mit.edu, +1 555 123 4567\nSKILLS\nPython, SQL"
+    assert compact_resume_text(resume).splitlines() == ["Jane Doe", "SKILLS", "Python, SQL"]
+
+def test_skip_is_capped_without_a_heading():
+    body = [f"line {i} without a heading." for i in range(BOILERPLATE_MAX_LINES + 5)]
+    compacted = compact_resume_text("\n".join(["Jane Doe", "Hobbies:"] + body)).splitlines()
+    assert compacted == ["Jane Doe"] + body[BOILERPLATE_MAX_LINES:]
+
+def test_trailing_boilerplate_is_removed():
+    resume = "Jane Doe\nEXPERIENCE\n- Built APIs\nDeclaration\nI confirm the above is true and correct."
+    assert compact_resume_text(resume).splitlines() == ["Jane Doe", "EXPERIENCE", "- Built APIs"]
+
+def test_is_heading_like():
+    for line in ("Work History", "Career Highlights", "TECHNICAL SKILLS", "Leadership:", "Tools & Platforms", "Experience"):
+        assert is_heading_like(line), line
+    for line in ("Reading", "Led 10 engineers", "Chess, hiking and photography", "- Built APIs", "I enjoy long walks in the park"):
+        assert not is_heading_like(line), line
@@ -0,0 +1,43 @@
+from sqlalchemy import text
+
+from database import Base, MatchJobResult, Resume, add_missing_columns, make_engine, run_migrations
+
+def init(bind):
+    Base.metadata.create_all(bind=bind)
+    add_missing_columns(bind)
+    run_migrations(bind)
+
+def insert_resume(conn, content_hash):
+    return conn.execute(Resume.__table__.insert().values(filename=f"{content_hash}.pdf", content_hash=content_hash)).inserted_primary_key[0]
+
+def test_resume_ids_are_not_reused_after_deleting_every_resume(tmp_path):
+    bind = make_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    init(bind)
+    with bind.begin() as conn:
+        first = [insert_resume(conn, f"a{i}") for i in range(3)]
+        conn.execute(Resume.__table__.delete())
+        assert insert_resume(conn, "b0") > max(first)
+
+def test_legacy_resumes_table_is_rebuilt_with_autoincrement(tmp_path):
+    bind = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with bind.begin() as conn:
+        # The resumes table as created before IDs were AUTOINCREMENT, with a job result for a resume deleted since
+        conn.execute(text("CREATE TABLE resumes (id INTEGER NOT NULL PRIMARY KEY, filename VARCHAR, content_hash VARCHAR)"))
+        conn.execute(text("CREATE UNIQUE INDEX ix_resumes_content_hash ON resumes (content_hash)"))
+        conn.execute(text("INSERT INTO resumes (id, filename, content_hash) VALUES (1, 'a.pdf', 'a'), (2, 'b.pdf', 'b')"))
+    Base.metadata.create_all(bind=bind, tables=[MatchJobResult.__table__])
+    with bind.begin() as conn:
+        conn.execute(MatchJobResult.__table__.insert().values(job_id="j", resume_id=7, overall_score=5.0))
+
+    init(bind)
+    with bind.begin() as conn:
+        table_sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'resumes'")).scalar()
+        assert "AUTOINCREMENT" in table_sql
+        assert conn.execute(text("SELECT id, filename, content_hash FROM resumes ORDER BY id")).all() == [(1, "a.pdf", "a"), (2, "b.pdf", "b")]
+        conn.execute(Resume.__table__.delete())
+        assert insert_resume(conn, "c") == 8
+
+    # Applied once: running init again keeps the data
+    init(bind)
+    with bind.connect() as conn:
+        assert conn.execute(text("SELECT content_hash FROM resumes")).scalars().all() == ["c"]
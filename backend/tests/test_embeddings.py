@@ -0,0 +1,18 @@
+from embeddings import EMBEDDING_COMPACT_RATIO, EmbeddingStore, HashedNgramEmbedder
+
+def test_remove_compacts_once_tombstones_pass_the_ratio(tmp_path):
+    store = EmbeddingStore(str(tmp_path), embedder=HashedNgramEmbedder(dim=64))
+    store.add(list(range(1, 11)), [f"python engineer {i}" for i in range(1, 11)])
+    generation = store._read_meta()["generation"]
+
+    # Tombstones up to the ratio stay in the current generation
+    below = int(EMBEDDING_COMPACT_RATIO * 10)
+    store.remove(list(range(1, below + 1)))
+    assert store._read_meta()["generation"] == generation
+
+    store.remove([below + 1])
+    assert store._read_meta()["generation"] != generation
+    live = set(range(below + 2, 11))
+    assert store.stored_ids() == live
+    assert len(store) == len(live)
+    assert {resume_id for resume_id, _ in store.rank("python engineer")} == live
@@ -0,0 +1,196 @@
+import json
+import asyncio
+
+import pytest
+
+import fake_llm
+from llm_client import AsyncLLMClient, score_batch, score_profile
+from llm_matcher import (
+    BATCH_SCORING_INSTRUCTIONS, estimate_tokens, format_batch_candidate, parse_batch_scores, parse_scores, plan_batches,
+)
+
+JD = "Backend engineer with Python, AWS and PostgreSQL experience"
+
+def profile(index, skills=("python", "aws")):
+    return {
+        "name": f"Candidate {index}",
+        "email": f"candidate{index}@example.com",
+        "phone": "Not Found",
+        "skills": list(skills),
+        "experience": "5 years building APIs",
+        "education": "BSc Computer Science",
+    }
+
+def items(count):
+    return [(i, profile(i)) for i in range(1, count + 1)]
+
+def entry(candidate_id, score=7.0):
+    return {
+        "candidate_id": candidate_id,
+        "overall_score": score,
+        "skills_score": score,
+        "experience_score": score,
+        "education_score": score,
+        "strengths": ["python"],
+        "gaps": [],
+        "justification": "ok",
+        "recommendation": "Recommended",
+    }
+
+def make_client(model):
+    return AsyncLLMClient(model=model, rate_per_second=0, max_retries=0, backoff_base=0)
+
+class PartialBatchModel(fake_llm.FakeModel):
+    """Answers batch prompts like FakeModel, then applies `edit` to the list of entries."""
+
+    def __init__(self, edit):
+        super().__init__()
+        self.edit = edit
+        self.prompts = []
+
+    def respond(self, prompt):
+        self.prompts.append(prompt)
+        reply = super().respond(prompt)
+        if "Candidate Profiles (one JSON object per line)" in prompt:
+            return json.dumps(self.edit(json.loads(reply)))
+        return reply
+
+def test_plan_batches_fits_every_batch_within_budget():
+    candidates = items(30)
+    fixed_cost = estimate_tokens(BATCH_SCORING_INSTRUCTIONS) + estimate_tokens(JD)
+    per_candidate = estimate_tokens(format_batch_candidate(1, profile(1)))
+    budget = fixed_cost + per_candidate * 4
+
+    batches = plan_batches(candidates, JD, token_budget=budget, max_batch_size=100)
+
+    assert [pair for batch in batches for pair in batch] == candidates
+    for batch in batches:
+        cost = fixed_cost + sum(estimate_tokens(format_batch_candidate(c, p)) for c, p in batch)
+        assert cost <= budget
+    assert max(len(batch) for batch in batches) >= 3
+
+def test_plan_batches_caps_batch_size():
+    batches = plan_batches(items(25), JD, token_budget=10**6, max_batch_size=10)
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+def test_plan_batches_keeps_oversized_candidate_in_its_own_batch():
+    big = profile(2, skills=["skill%d" % i for i in range(2000)])
+    batches = plan_batches([(1, profile(1)), (2, big), (3, profile(3))], JD, token_budget=1000, max_batch_size=10)
+    assert [[c for c, _ in batch] for batch in batches] == [[1], [2], [3]]
+
+def test_plan_batches_empty():
+    assert plan_batches([], JD) == []
+
+def test_parse_batch_scores_maps_entries_to_candidates():
+    batch = items(2)
+    results = parse_batch_scores(batch, json.dumps([entry(2, 6.5), entry(1, 8)]))
+    assert set(results) == {1, 2}
+    assert results[1]["overall_score"] == 8
+    assert results[1]["name"] == "Candidate 1"
+    assert results[2]["overall_score"] == 6.5
+
+def test_parse_batch_scores_skips_missing_unknown_and_non_numeric():
+    batch = items(4)
+    reply = [
+        entry(1),
+        entry(99),                                   # not in the batch
+        entry(2, "high"),                            # non-numeric score
+        entry(3, None),
+        {k: v for k, v in entry(4).items() if k != "candidate_id"},
+        "not an object",
+    ]
+    assert set(parse_batch_scores(batch, json.dumps(reply))) == {1}
+
+def test_parse_batch_scores_duplicate_id_keeps_last_entry():
+    results = parse_batch_scores(items(1), json.dumps([entry(1, 3), entry(1, 9)]))
+    assert results[1]["overall_score"] == 9
+
+def test_parse_batch_scores_accepts_fenced_json():
+    reply = "```json\n" + json.dumps([entry(1)]) + "\n```"
+    assert set(parse_batch_scores(items(1), reply)) == {1}
+
+@pytest.mark.parametrize("reply", ['{"candidate_id": 1, "overall_score": 5}', "not json"])
+def test_parse_batch_scores_rejects_non_array_replies(reply):
+    with pytest.raises(ValueError):
+        parse_batch_scores(items(1), reply)
+
+def test_score_batch_falls_back_to_single_calls_for_unparsed_candidates():
+    # Drop candidate 2, corrupt candidate 3's score and add an unknown ID
+    def edit(entries):
+        kept = [e for e in entries if e["candidate_id"] != 2]
+        for e in kept:
+            if e["candidate_id"] == 3:
+                e["overall_score"] = "n/a"
+        return kept + [entry(99)]
+
+    model = PartialBatchModel(edit)
+    batch = items(4)
+    outcomes = asyncio.run(score_batch(make_client(model), batch, JD))
+
+    assert set(outcomes) == {1, 2, 3, 4}
+    assert {c: status for c, (_, status) in outcomes.items()} == {1: "scored", 2: "retried", 3: "retried", 4: "scored"}
+    assert all(isinstance(result["overall_score"], float) for result, _ in outcomes.values())
+    # One batch request plus one single-profile request per candidate the batch reply missed
+    assert model.calls == 3
+    assert sum("**Candidate Profile:**" in p for p in model.prompts) == 2
+
+def test_score_batch_falls_back_for_every_candidate_when_reply_is_unusable():
+    model = PartialBatchModel(lambda entries: {"not": "a list"})
+    outcomes = asyncio.run(score_batch(make_client(model), items(3), JD))
+    assert model.calls == 4
+    assert {status for _, status in outcomes.values()} == {"retried"}
+
+@pytest.mark.parametrize("score", [None, "8", True])
+def test_parse_scores_rejects_non_numeric_overall_score(score):
+    with pytest.raises(ValueError):
+        parse_scores(profile(1), json.dumps({k: v for k, v in entry(1, score).items() if k != "candidate_id"}))
+
+def test_parse_scores_rejects_non_object_reply():
+    with pytest.raises(ValueError):
+        parse_scores(profile(1), json.dumps([entry(1)]))
+
+class NullScoreModel(fake_llm.FakeModel):
+    """Replies to single-profile prompts with a null overall_score until `bad_replies` run out."""
+
+    def __init__(self, bad_replies):
+        super().__init__()
+        self.bad_replies = bad_replies
+
+    def respond(self, prompt):
+        reply = json.loads(super().respond(prompt))
+        if self.bad_replies:
+            self.bad_replies -= 1
+            reply["overall_score"] = None
+        return json.dumps(reply)
+
+def test_score_profile_retries_a_null_score():
+    client = AsyncLLMClient(model=NullScoreModel(1), rate_per_second=0, max_retries=1, backoff_base=0)
+    result, status = asyncio.run(score_profile(client, profile(1), JD))
+    assert status == "retried"
+    assert isinstance(result["overall_score"], float)
+
+def test_score_profile_fails_with_a_numeric_score_when_replies_stay_invalid():
+    result, status = asyncio.run(score_profile(make_client(NullScoreModel(5)), profile(1), JD))
+    assert status == "failed"
+    assert result["overall_score"] == 0.0
+
+def test_match_reports_llm_requests_not_candidates():
+    import fitz
+    from fastapi.testclient import TestClient
+
+    import main
+
+    def resume_pdf(text):
+        doc = fitz.open()
+        doc.new_page().insert_text((50, 60), text, fontsize=10)
+        data = doc.tobytes()
+        doc.close()
+        return data
+
+    with TestClient(main.app) as client:
+        files = [("files", (f"{i}.pdf", resume_pdf(f"Candidate {i} python aws postgresql"), "application/pdf")) for i in range(4)]
+        assert client.post("/batch-upload", files=files, data={"mode": "replace"}).json()["successful"] == 4
+        body = client.post("/match", data={"job_description": JD + " batch-count check", "incremental": "false"}).json()
+    assert body["freshly_scored"] == 4
+    # Profiles were extracted at upload, so the four candidates cost one batch request
+    assert body["llm_calls"] == body["token_usage"]["requests"] == 1
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.mark.parametrize("method, path, fields", [
+    ("post", "/match", {"job_description": "python"}),
+    ("get", "/match/stream", {"job_description": "python"}),
+    ("post", "/match-jobs", {"job_description": "python"}),
+    ("post", "/match-multi", {"job_descriptions": "python"}),
+])
+@pytest.mark.parametrize("option, value", [("scoring_mode", "magic"), ("prerank", "random")])
+def test_match_endpoints_validate_shared_options(client, method, path, fields, option, value):
+    fields = {**fields, option: value}
+    if method == "get":
+        response = client.get(path, params=fields)
+    else:
+        response = client.post(path, data=fields)
+    assert response.status_code == 400
+    assert option in response.json()["detail"]
+
+def test_match_options_values_are_iter_match_results_arguments():
+    options = main.MatchOptions(False, 50, True, "cascade", "semantic", False, 6.5, 0.2)
+    assert options.values == {
+        "batch_scoring": False, "prefilter_top_n": 50, "score_all": True, "scoring_mode": "cascade",
+        "prerank": "semantic", "incremental": False, "cascade_min_score": 6.5, "cascade_top_fraction": 0.2,
+    }
+
+@pytest.mark.parametrize("scoring_mode", ["local", "semantic"])
+def test_offline_match_multi_is_incremental(client, scoring_mode):
+    from test_cascade import RESUMES, resume_pdf
+
+    files = [("files", (f"{i}.pdf", resume_pdf(lines), "application/pdf")) for i, lines in enumerate(RESUMES)]
+    assert client.post("/batch-upload", files=files).json()["successful"] == len(RESUMES)
+    fields = {"job_descriptions": [f"Python backend engineer ({scoring_mode})", f"AWS Docker engineer ({scoring_mode})"],
+              "scoring_mode": scoring_mode}
+    counts = lambda body: [(m["reused"], m["freshly_scored"]) for m in body["matches"]]
+    first = client.post("/match-multi", data=fields).json()
+    assert counts(first) == [(0, len(RESUMES))] * 2
+    second = client.post("/match-multi", data=fields).json()
+    assert counts(second) == [(len(RESUMES), 0)] * 2
+    scores = lambda body: [[(c["resume_id"], c["overall_score"]) for c in m["shortlisted_candidates"]] for m in body["matches"]]
+    assert scores(second) == scores(first)
+    full = client.post("/match-multi", data={**fields, "incremental": "false"}).json()
+    assert counts(full) == [(0, len(RESUMES))] * 2
@@ -0,0 +1,58 @@
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import fake_llm
+import main
+from database import MatchResult, ScoreCache, Session as SessionLocal
+from llm_client import AsyncLLMClient
+
+JD = "Data engineer with Python, Spark and Airflow"
+
+class ExtractionModel(fake_llm.FakeModel):
+    """FakeModel whose profile extraction fails while `broken` is set."""
+
+    broken = True
+
+    def respond(self, prompt):
+        if self.broken and "**Candidate Resume (Text):**" in prompt:
+            raise ValueError("unparseable extraction reply")
+        return super().respond(prompt)
+
+def resume_pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 60), text, fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+@pytest.fixture
+def client(monkeypatch):
+    model = ExtractionModel()
+    monkeypatch.setattr(main, "get_llm_client", lambda: AsyncLLMClient(model=model, rate_per_second=0, max_retries=0))
+    with TestClient(main.app) as client:
+        files = [("files", ("dana.pdf", resume_pdf("Dana Data python spark airflow engineer"), "application/pdf"))]
+        assert client.post("/batch-upload", files=files, data={"mode": "replace"}).json()["successful"] == 1
+        yield client, model
+
+def stored_rows():
+    db = SessionLocal()
+    try:
+        return db.query(MatchResult).filter(MatchResult.scoring_mode == "llm").count(), db.query(ScoreCache).count()
+    finally:
+        db.close()
+
+def test_failed_extraction_is_reported_failed_and_never_stored(client):
+    client, model = client
+    before = stored_rows()
+    body = client.post("/match", data={"job_description": JD}).json()
+    assert [c["status"] for c in body["shortlisted_candidates"]] == ["failed"]
+    assert body["outcomes"]["failed"] == 1
+    assert stored_rows() == before
+
+    # Once extraction works the resume is scored for real, not served a stored empty-profile score
+    model.broken = False
+    body = client.post("/match", data={"job_description": JD}).json()
+    [candidate] = body["shortlisted_candidates"]
+    assert candidate["status"] == "scored"
+    assert candidate["overall_score"] > 0
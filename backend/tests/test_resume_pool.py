@@ -0,0 +1,25 @@
+import random
+
+from app import ResumePool, score_resume_against_jd
+
+SKILLS = "python java sql aws docker kubernetes react c++ c# node.js spark kafka excel figma".split()
+WORDS = "led built designed shipped migrated scaled team platform pipeline service api latency".split()
+
+def resume(rng):
+    skills = rng.sample(SKILLS, rng.randint(0, 6))
+    text = (
+        f"{rng.randint(0, 12)} years of experience. " + " ".join(rng.choice(WORDS + skills) for _ in range(40))
+        + (" Bachelor of Technology" if rng.random() < 0.5 else "")
+    )
+    return text, skills
+
+def test_pool_scores_match_per_resume_scores():
+    rng = random.Random(7)
+    docs = [resume(rng) for _ in range(200)] + [("", []), ("no skills here", [])]
+    pool = ResumePool(docs)
+    for jd in (
+        "Backend engineer, 5+ years, Python, AWS, Kafka, bachelor degree required",
+        "React and Figma designer",
+        "",
+    ):
+        assert pool.score(jd) == [score_resume_against_jd(jd, text, skills) for text, skills in docs]
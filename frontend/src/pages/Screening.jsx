@@ -4,11 +4,25 @@ import { useNavigate } from 'react-router-dom'
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
 
+// Subscribe to /match/stream; resolves with the final summary (same shape as POST /match)
+function streamMatch(jobDescription, onProgress){
+  return new Promise((resolve, reject)=>{
+    const es = new EventSource(`${API_BASE}/match/stream?job_description=${encodeURIComponent(jobDescription)}`)
+    let completed = 0
+    let total = 0
+    es.addEventListener('candidate', ()=>{ completed += 1; onProgress({completed, total}) })
+    es.addEventListener('progress', e=>{ const p = JSON.parse(e.data); completed = p.completed; total = p.total; onProgress(p) })
+    es.addEventListener('summary', e=>{ es.close(); resolve(JSON.parse(e.data)) })
+    es.onerror = ()=>{ es.close(); reject(new Error('Lost connection while matching')) }
+  })
+}
+
 export default function Screening(){
   const [files, setFiles] = useState([])
   const [role, setRole] = useState('')
   const [busy, setBusy] = useState(false)
   const [showFullLoader, setShowFullLoader] = useState(false)
+  const [progress, setProgress] = useState(null)
   const nav = useNavigate()
 
   useEffect(()=>{
@@ -46,13 +60,12 @@ export default function Screening(){
 
       await axios.post(`${API_BASE}/batch-upload`, form, { headers: {'Content-Type':'multipart/form-data'} })
 
-      // After upload, trigger match with job description
-      const jdForm = new FormData()
-      jdForm.append('job_description', role || '')
-      const matchResp = await axios.post(`${API_BASE}/match`, jdForm)
+      // After upload, stream match results for the job description
+      setProgress(null)
+      const summary = await streamMatch(role || '', setProgress)
 
       // Save results to localStorage and navigate to results
-      localStorage.setItem('screen_results', JSON.stringify(matchResp.data))
+      localStorage.setItem('screen_results', JSON.stringify(summary))
       nav('/results')
     }catch(err){
       console.error(err)
@@ -69,6 +82,7 @@ export default function Screening(){
       {showFullLoader && (
         <div className="screen-overlay" role="status" aria-live="polite" aria-hidden="false">
           <dotlottie-wc src="https://lottie.host/fad050a0-e2d2-4d0d-8f18-aa45f9567066/BLoCNQf3b9.lottie" style={{width:300, height:300}} autoplay loop aria-label="processing" />
+          {progress && progress.total > 0 && (<div className="muted">Scored {progress.completed} of {progress.total} candidates</div>)}
         </div>
       )}
   <div aria-hidden={showFullLoader} style={ showFullLoader ? {pointerEvents:'none'} : undefined }>